@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Benchmark the summarizer pipeline on synthetic browser history.
+
+Generates Chrome (`urls`), Safari (`history_items`/`history_visits`) and
+Firefox (`moz_places`) databases with realistic schemas in a temporary
+directory, points the `*_history_path` functions at them and times each
+stage. Runs anywhere (no macOS browser paths needed).
+
+    python benchmarks/bench.py --sizes 10000,100000,1000000 --out bench.json
+
+Results are JSON so runs can be compared across commits.
+"""
+
+import argparse, json, os, platform, random, shutil, sqlite3, subprocess, sys, tempfile, time
+from pathlib import Path
+
+# keep every output the package writes (notes, warehouse, caches) inside the sandbox
+SANDBOX = Path(tempfile.mkdtemp(prefix="summarizer-bench-"))
+os.environ["HOME"] = str(SANDBOX)
+
+from summarizer import extractors, markdown_gen, classify, config  # noqa: E402
+from summarizer.utils import sqlite_snapshot  # noqa: E402
+from summarizer.window import Window  # noqa: E402
+
+CHROME_EPOCH_US = extractors.CHROME_EPOCH_US
+SAFARI_EPOCH_S = extractors.SAFARI_EPOCH_S
+
+HOSTS = ["github.com", "stackoverflow.com", "www.nytimes.com", "www.bbc.co.uk", "www.amazon.com",
+         "en.wikipedia.org", "developer.mozilla.org", "docs.python.org", "news.ycombinator.com",
+         "www.reddit.com", "twitter.com", "aws.amazon.com", "huggingface.co", "example.org"]
+WORDS = sorted({kw.strip(".") for kws in list(classify.TOPICS_KEYWORDS.values()) + list(classify.TAGS_KEYWORDS.values())
+                for kw in kws if "." not in kw}) + ["weather", "recipe", "holiday", "budget", "meeting", "notes", "travel"]
+
+
+def synthetic_visits(n, days, seed=0):
+    """(url, title, unix_us) tuples over the last `days` days; ~15% searches, ~5% YouTube."""
+    rnd = random.Random(seed)
+    now = int(time.time() * 1_000_000)
+    span = days * 86_400_000_000
+    for i in range(n):
+        words = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(2, 6)))
+        r = rnd.random()
+        if r < 0.15:
+            url = f"https://www.google.com/search?q={words.replace(' ', '+')}&ei={i}"
+        elif r < 0.20:
+            url = f"https://www.youtube.com/watch?v=v{i:08d}&t={rnd.randint(0, 600)}"
+        else:
+            url = f"https://{rnd.choice(HOSTS)}/{words.replace(' ', '/')}/{i}?utm_source=bench"
+        yield url, words.title(), now - rnd.randrange(span)
+
+
+def make_chrome(path, visits):
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE urls(id INTEGER PRIMARY KEY AUTOINCREMENT, url LONGVARCHAR, title LONGVARCHAR,
+            visit_count INTEGER DEFAULT 0 NOT NULL, typed_count INTEGER DEFAULT 0 NOT NULL,
+            last_visit_time INTEGER NOT NULL, hidden INTEGER DEFAULT 0 NOT NULL);
+        CREATE INDEX urls_url_index ON urls(url);
+    """)
+    conn.executemany("INSERT INTO urls(url,title,visit_count,last_visit_time) VALUES(?,?,1,?)",
+                     ((u, t, ts + CHROME_EPOCH_US) for u, t, ts in visits))
+    conn.commit()
+    conn.close()
+
+
+def make_safari(path, visits):
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE history_items(id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL UNIQUE,
+            domain_expansion TEXT NULL, visit_count INTEGER NOT NULL DEFAULT 0);
+        CREATE TABLE history_visits(id INTEGER PRIMARY KEY AUTOINCREMENT, history_item INTEGER NOT NULL
+            REFERENCES history_items(id) ON DELETE CASCADE, visit_time REAL NOT NULL, title TEXT NULL,
+            load_successful BOOLEAN NOT NULL DEFAULT 1);
+        CREATE INDEX history_visits__last_visit ON history_visits(history_item, visit_time);
+        CREATE INDEX history_visits__visit_time ON history_visits(visit_time);
+    """)
+    visits = list(visits)
+    conn.executemany("INSERT INTO history_items(id,url,visit_count) VALUES(?,?,1)",
+                     ((i, u) for i, (u, _, _) in enumerate(visits, 1)))
+    conn.executemany("INSERT INTO history_visits(history_item,visit_time,title) VALUES(?,?,?)",
+                     ((i, ts / 1_000_000 - SAFARI_EPOCH_S, t) for i, (_, t, ts) in enumerate(visits, 1)))
+    conn.commit()
+    conn.close()
+
+
+def make_firefox(path, visits):
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE moz_places(id INTEGER PRIMARY KEY, url LONGVARCHAR, title LONGVARCHAR, rev_host LONGVARCHAR,
+            visit_count INTEGER DEFAULT 0, hidden INTEGER DEFAULT 0 NOT NULL, typed INTEGER DEFAULT 0 NOT NULL,
+            frecency INTEGER DEFAULT -1 NOT NULL, last_visit_date INTEGER, guid TEXT, url_hash INTEGER DEFAULT 0 NOT NULL);
+        CREATE INDEX moz_places_lastvisitdateindex ON moz_places(last_visit_date);
+    """)
+    conn.executemany("INSERT INTO moz_places(url,title,visit_count,last_visit_date) VALUES(?,?,1,?)", visits)
+    conn.commit()
+    conn.close()
+
+
+def timed(results, stage, browser, rows, fn, *args):
+    t = time.perf_counter()
+    out = fn(*args)
+    dt = time.perf_counter() - t
+    results.append({"stage": stage, "browser": browser, "rows": rows, "seconds": round(dt, 6),
+                    "rows_per_s": round(rows / dt) if dt else None})
+    print(f"  {stage:<22} {browser:<8} {rows:>9} rows  {dt:8.3f}s", file=sys.stderr)
+    return out
+
+
+def bench_size(n, days, results):
+    root = SANDBOX / f"n{n}"
+    root.mkdir()
+    paths = {"Chrome": root / "History", "Safari": root / "History.db", "Firefox": root / "places.sqlite"}
+    print(f"▶ {n} rows per browser", file=sys.stderr)
+    timed(results, "generate", "Chrome", n, make_chrome, paths["Chrome"], synthetic_visits(n, days, 1))
+    timed(results, "generate", "Safari", n, make_safari, paths["Safari"], synthetic_visits(n, days, 2))
+    timed(results, "generate", "Firefox", n, make_firefox, paths["Firefox"], synthetic_visits(n, days, 3))
+
+    extractors.chrome_history_path = lambda: paths["Chrome"]
+    extractors.brave_history_path = lambda: None
+    extractors.safari_history_path = lambda: paths["Safari"]
+    extractors.firefox_history_path = lambda: paths["Firefox"]
+
+    window = Window.trailing(days)
+    rows_fns = {"Chrome": lambda p: extractors.chrome_like_rows("Chrome", p, window=window),
+                "Safari": lambda p: extractors.safari_rows(p, window=window),
+                "Firefox": lambda p: extractors.firefox_rows(p, window=window)}
+    entries_fns = {"Chrome": lambda r: extractors.chrome_like_entries("Chrome", r),
+                   "Safari": extractors.safari_entries, "Firefox": extractors.firefox_entries}
+
+    def snapshot(p):
+        with sqlite_snapshot(p) as conn:
+            conn.execute("SELECT count(*) FROM sqlite_master").fetchone()
+
+    visits = []
+    for browser, p in paths.items():
+        timed(results, "copy (shutil baseline)", browser, n, shutil.copyfile, p, root / f"{p.name}.copy")
+        results[-1]["db_bytes"] = p.stat().st_size
+        timed(results, "snapshot", browser, n, snapshot, p)
+        rows = timed(results, "query", browser, n, rows_fns[browser], p)
+        visits += timed(results, "records", browser, len(rows), entries_fns[browser], rows)
+    visits.sort(key=lambda v: v.ts, reverse=True)
+    total = len(visits)
+
+    matcher = timed(results, "compile matcher", "-", 0, classify.KeywordMatcher,
+                    classify.TOPICS_KEYWORDS, classify.TAGS_KEYWORDS)
+    timed(results, "classify (keywords)", "all", total, lambda: [matcher.classify(v.title, v.url) for v in visits])
+    classify._CACHE = classify.ClassificationCache(classify.config_fingerprint(), size=total, path=None)
+    timed(results, "classify (cold cache)", "all", total, lambda: [classify.classify(v.title, v.url) for v in visits])
+    timed(results, "classify (warm cache)", "all", total, lambda: [classify.classify(v.title, v.url) for v in visits])
+    timed(results, "extract_search_query", "all", total, lambda: [classify.extract_search_query(v.url) for v in visits])
+
+    markdown_gen.DAILY_DIR = root / "daily"
+    markdown_gen.WEEKLY_DIR = root / "weekly"
+    markdown_gen.DAILY_DIR.mkdir()
+    markdown_gen.WEEKLY_DIR.mkdir()
+    days_ = window.partition(visits)
+    today = days_[window.last_day]
+    timed(results, "write_daily", "all", len(today), markdown_gen.write_daily, window.last_day, today)
+    timed(results, "write_weekly", "all", total, markdown_gen.write_weekly, window.first_day, window.last_day, visits)
+    shutil.rmtree(root)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark summarizer stages on synthetic history")
+    parser.add_argument("--sizes", default="10000,100000", help="Comma-separated rows per browser")
+    parser.add_argument("--days", type=int, default=config.DAYS_FOR_WEEKLY, help="Days of history to spread rows over")
+    parser.add_argument("--out", help="Write JSON results here (default: stdout)")
+    args = parser.parse_args()
+
+    results = []
+    try:
+        for n in (int(s) for s in args.sizes.split(",")):
+            bench_size(n, args.days, results)
+    finally:
+        shutil.rmtree(SANDBOX, ignore_errors=True)
+
+    report = {"commit": git_commit(), "python": platform.python_version(), "platform": platform.platform(),
+              "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "days": args.days, "results": results}
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
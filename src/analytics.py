@@ -0,0 +1,61 @@
+import datetime, urllib.parse
+from collections import Counter
+try: import numpy as np
+except ImportError: np=None
+
+SLOT_US=900_000_000  # 15 minutes; every UTC offset in use is a multiple of this
+
+def _intern(values, table):
+    return [table.setdefault(v,len(table)) for v in values]
+
+def _domain_ids(visits, domains):
+    """Domain id per visit; each distinct URL is parsed once."""
+    by_url={}; ids=[]
+    for v in visits:
+        i=by_url.get(v.url)
+        if i is None: i=by_url[v.url]=domains.setdefault(urllib.parse.urlparse(v.url).netloc, len(domains))
+        ids.append(i)
+    return ids
+
+def _slot_clock(slots):
+    """(local hour, local weekday) for each 15-minute UTC slot; DST-correct, one datetime per slot."""
+    return [(d.hour, d.weekday()) for d in (datetime.datetime.fromtimestamp(s*SLOT_US/1_000_000) for s in slots)]
+
+def weekly_stats(visits, topics, top_n=5):
+    """Hour-of-day and day-of-week histograms, per-browser counts and top domains per topic.
+
+    `topics` holds the topic label of each visit. Returns a dict with `hours`
+    (24 counts), `weekdays` (7 counts, Monday first), `browsers` and
+    `top_domains` ({topic: [(domain, count), ...]}, all domains if `top_n` is
+    None); ties are broken by name.
+    Uses NumPy when it is installed and plain Python otherwise.
+    """
+    domains={}; topic_ids={}; browser_ids={}
+    dom=_domain_ids(visits, domains); top=_intern(topics, topic_ids); brw=_intern((v.browser for v in visits), browser_ids)
+    dom_names=list(domains); topic_names=list(topic_ids); browser_names=list(browser_ids)
+    if np is not None and visits: hours,weekdays,per_browser,pairs=_numpy_counts(visits, dom, top, brw, len(dom_names))
+    else: hours,weekdays,per_browser,pairs=_python_counts(visits, dom, top, brw)
+    top_domains={t:[] for t in topic_names}
+    for (t,d),c in sorted(pairs.items(), key=lambda kv:(kv[0][0], -kv[1], dom_names[kv[0][1]])):
+        lst=top_domains[topic_names[t]]
+        if top_n is None or len(lst)<top_n: lst.append((dom_names[d],c))
+    browsers=sorted(((browser_names[i],c) for i,c in enumerate(per_browser) if c), key=lambda kv:(-kv[1],kv[0]))
+    return {'hours':hours, 'weekdays':weekdays, 'browsers':browsers, 'top_domains':top_domains}
+
+def _python_counts(visits, dom, top, brw):
+    slots=Counter(v.ts//SLOT_US for v in visits); hours=[0]*24; weekdays=[0]*7
+    for (h,wd),c in zip(_slot_clock(slots), slots.values()): hours[h]+=c; weekdays[wd]+=c
+    per_browser=[0]*(max(brw)+1 if brw else 0)
+    for b in brw: per_browser[b]+=1
+    return hours, weekdays, per_browser, Counter(zip(top,dom))
+
+def _numpy_counts(visits, dom, top, brw, n_domains):
+    ts=np.fromiter((v.ts for v in visits), dtype=np.int64, count=len(visits))
+    slots,inv=np.unique(ts//SLOT_US, return_inverse=True)
+    clock=np.array(_slot_clock(slots.tolist()), dtype=np.int64).reshape(-1,2)
+    hours=np.bincount(clock[inv.ravel(),0], minlength=24)
+    weekdays=np.bincount(clock[inv.ravel(),1], minlength=7)
+    per_browser=np.bincount(np.asarray(brw, dtype=np.int64))
+    keys,counts=np.unique(np.asarray(top, dtype=np.int64)*n_domains+np.asarray(dom, dtype=np.int64), return_counts=True)
+    pairs={(int(k)//n_domains, int(k)%n_domains):int(c) for k,c in zip(keys,counts)}
+    return hours.tolist(), weekdays.tolist(), per_browser.tolist(), pairs
@@ -0,0 +1,76 @@
+import sys, time, datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .config import DAYS_FOR_WEEKLY, INCREMENTAL, DAILY_DIR, SEARCH_INDEX
+from .window import Window
+
+def _render_day(day, visits, note=True):
+    """Worker: write one day's aggregate and (with `note`) its daily note; returns it and the pages the domain index learned."""
+    from .markdown_gen import write_daily
+    from .rollup import day_aggregate, save_aggregate
+    from .classify import flush_state, domain_index
+    domains=domain_index()
+    if domains: domains.log=[]  # the parent learns these and saves the index once
+    if note: write_daily(day, visits)
+    agg=day_aggregate(day, visits); save_aggregate(day, agg)
+    flush_state()
+    return agg, domains.log if domains else []
+
+def _render_week(first, last, aggs):
+    from .markdown_gen import write_weekly_summary
+    from .rollup import merge_aggregates
+    return write_weekly_summary(first, last, merge_aggregates(aggs))
+
+def week_blocks(first, last, days=DAYS_FOR_WEEKLY):
+    """Consecutive `days`-long (first, last) blocks ending on `last` and reaching back to `first`."""
+    blocks=[]
+    while last>=first:
+        blocks.append((last-datetime.timedelta(days=days-1), last)); last-=datetime.timedelta(days=days)
+    return blocks
+
+def _progress(done, total, started, what):
+    rate=done/max(time.monotonic()-started, 1e-9)
+    print(f"\r  {what}: {done}/{total} · {rate:.1f}/s", end='' if done<total else '\n', file=sys.stderr, flush=True)
+
+def backfill(first, last, workers=None):
+    """Write daily notes for every day in [first, last] and weekly notes covering the range.
+
+    History is extracted once for the whole range (through the warehouse when
+    INCREMENTAL is on) and split by local day; days and weeks are then
+    rendered on a process pool. Days without visits get no daily note. The
+    oldest weekly block may start before `first`; its earlier days are
+    aggregated (but get no daily note) so that week is complete too.
+    """
+    from .extractors import ingest, stream_sources
+    from .warehouse import Warehouse
+    from .obsidian import sync_vault
+    from .search import index_days
+    from .rollup import day_signature
+    from .classify import flush_state, domain_index
+    blocks=week_blocks(first, last)
+    window=Window(min(first, blocks[-1][0]), last)
+    if INCREMENTAL:
+        wh=Warehouse()
+        try:
+            ingest(wh, window)
+            days=window.partition(wh.iter_range(window.start, window.end))
+        finally: wh.close()
+    else: days=window.partition(stream_sources(window))
+    active=[d for d in window.days if days[d]]; busy=[d for d in active if d>=first]
+    print(f"📚 Backfilling {first} → {last}: {sum(len(v) for v in days.values())} visits over {len(busy)} active days", file=sys.stderr)
+    aggs={d:{'date':d.isoformat(),'visits':0,'hours':[0]*24,'browsers':{},'tags':{},'topics':{}} for d in window.days}
+    domains=domain_index()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        started=time.monotonic(); futs={pool.submit(_render_day, d, days[d], d>=first):d for d in active}
+        for i,fut in enumerate(as_completed(futs),1):
+            aggs[futs[fut]],learned=fut.result(); _progress(i, len(futs), started, 'days')
+            if domains: domains.replay(learned)
+        started=time.monotonic()
+        futs=[pool.submit(_render_week, a, b, [aggs[d] for d in reversed(Window(a,b).days)]) for a,b in blocks]
+        weekly=[]
+        for i,fut in enumerate(as_completed(futs),1):
+            weekly.append(fut.result()); _progress(i, len(futs), started, 'weeks')
+    # the vault is synced once, from this process, so the manifest has a single writer
+    sync_vault([(d, DAILY_DIR/f"{d.isoformat()}.md") for d in busy], weekly)
+    if SEARCH_INDEX: index_days(busy, lambda d: day_signature(days[d]), days.__getitem__)
+    flush_state()
+    print(f"✅ Backfill complete: {len(busy)} daily and {len(blocks)} weekly notes.")
@@ -0,0 +1,61 @@
+import sqlite3, threading, hashlib, json, time
+from collections import OrderedDict
+from .config import CLASSIFY_CACHE_SIZE, CLASSIFY_CACHE_DB, CLASSIFY_CACHE_DB_SIZE
+
+class ClassificationCache:
+    """LRU of (topic, tags) keyed by normalized (text, url) and a config fingerprint.
+
+    Lives in memory for the run and, when `path` is set, in a small SQLite file
+    so results survive between runs. Rows written under a different fingerprint
+    (keyword tables or tagger changed) are dropped when the file is opened.
+    """
+    def __init__(self, fingerprint, size=CLASSIFY_CACHE_SIZE, path=CLASSIFY_CACHE_DB, db_size=CLASSIFY_CACHE_DB_SIZE):
+        self.fp=fingerprint; self.size=size; self.db_size=db_size
+        self.mem=OrderedDict(); self.dirty={}; self.touched=set(); self.transient=set()
+        self.lock=threading.Lock(); self.db=None
+        if path:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.db=sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS classify(key TEXT PRIMARY KEY, fp TEXT, topic TEXT, tags TEXT, used REAL)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS classify_used ON classify(used)")
+            self.db.execute("DELETE FROM classify WHERE fp!=?",(fingerprint,)); self.db.commit()
+
+    def key(self, text, url):
+        norm=f"{self.fp}\0{' '.join((text or '').split())}\0{url or ''}"
+        return hashlib.blake2b(norm.encode(), digest_size=16).hexdigest()
+
+    def _remember(self, k, val):
+        self.mem[k]=val; self.mem.move_to_end(k)
+        while len(self.mem)>self.size: self.mem.popitem(last=False)
+
+    def get(self, text, url):
+        k=self.key(text,url)
+        with self.lock:
+            val=self.mem.get(k)
+            if val is not None: self.mem.move_to_end(k); return val
+            if self.db is None: return None
+            row=self.db.execute("SELECT topic,tags FROM classify WHERE key=?",(k,)).fetchone()
+            if row is None: return None
+            val=(row[0], tuple(json.loads(row[1]))); self._remember(k,val); self.touched.add(k)
+            return val
+
+    def put(self, text, url, topic, tags, persist=True):
+        """Remember a result; with `persist=False` only until the next flush (never written to disk)."""
+        k=self.key(text,url); val=(topic, tuple(tags))
+        with self.lock:
+            self._remember(k,val)
+            if not persist: self.transient.add(k); self.dirty.pop(k,None)
+            elif self.db is not None: self.transient.discard(k); self.dirty[k]=val
+
+    def flush(self):
+        """Write new results to disk, refresh recency of disk hits, trim to `db_size` rows and forget transient results."""
+        with self.lock:
+            for k in self.transient: self.mem.pop(k,None)
+            self.transient.clear()
+            if self.db is None: return
+            now=time.time()
+            self.db.executemany("INSERT OR REPLACE INTO classify VALUES(?,?,?,?,?)",
+                [(k,self.fp,topic,json.dumps(tags),now) for k,(topic,tags) in self.dirty.items()])
+            self.db.executemany("UPDATE classify SET used=? WHERE key=?",[(now,k) for k in self.touched-self.dirty.keys()])
+            self.db.execute("DELETE FROM classify WHERE key IN (SELECT key FROM classify ORDER BY used DESC LIMIT -1 OFFSET ?)",(self.db_size,))
+            self.db.commit(); self.dirty.clear(); self.touched.clear()
@@ -0,0 +1,54 @@
+import re, fnmatch, functools, urllib.parse
+from .config import CANONICAL_DROP_PARAMS, CANONICAL_STRIP_FRAGMENT
+from .records import Page
+
+DEFAULT_PORTS={'http':80, 'https':443}
+
+def _drop_rx(patterns):
+    return re.compile('|'.join(fnmatch.translate(p.lower()) for p in patterns)) if patterns else None
+
+_DROP=_drop_rx(CANONICAL_DROP_PARAMS)
+
+@functools.lru_cache(maxsize=65536)
+def canonical_url(url):
+    """`url` with tracking parameters, default ports and fragments removed; non-web URLs are returned as is.
+
+    Query parameters whose (case-insensitive) name matches a CANONICAL_DROP_PARAMS
+    glob are dropped; the rest keep their order and original encoding. With
+    CANONICAL_STRIP_FRAGMENT the fragment goes too, unless it looks like a
+    client-side route (`#/...` or `#!...`).
+    """
+    try: parts=urllib.parse.urlsplit(url or '')
+    except ValueError: return url
+    scheme=parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname: return url
+    try: port=parts.port
+    except ValueError: return url
+    host=parts.hostname if ':' not in parts.hostname else f"[{parts.hostname}]"
+    netloc=host if port in (None, DEFAULT_PORTS[scheme]) else f"{host}:{port}"
+    if parts.username: netloc='@'.join((parts.netloc.rsplit('@',1)[0], netloc))
+    query=parts.query
+    if query and _DROP:
+        query='&'.join(kv for kv in query.split('&') if kv and not _DROP.match(urllib.parse.unquote_plus(kv.split('=',1)[0]).lower()))
+    frag=parts.fragment
+    if CANONICAL_STRIP_FRAGMENT and not frag.startswith(('/','!')): frag=''
+    return urllib.parse.urlunsplit((scheme, netloc, parts.path or '/', query, frag))
+
+class CanonicalIndex:
+    """Hash index from canonical URL to the Page collapsing every visit to it."""
+    def __init__(self, visits=()):
+        self.pages={}
+        for v in visits: self.add(v)
+
+    def add(self, v):
+        key=canonical_url(v.url); p=self.pages.get(key)
+        if p is None: self.pages[key]=Page(key, v)
+        else: p.add(v)
+        return self.pages[key]
+
+    def newest_first(self):
+        return sorted(self.pages.values(), key=lambda p:p.ts, reverse=True)
+
+def dedupe(visits):
+    """One Page per canonical URL in `visits`, most recently seen first."""
+    return CanonicalIndex(visits).newest_first()
@@ -1,6 +1,10 @@
-import re
-from collections import Counter
-from .config import EXTERNAL_TAGGER
+import re, urllib.parse, hashlib, json
+from collections import Counter, defaultdict
+from .config import EXTERNAL_TAGGER, LLM_TAGGER, MATCHER_CACHE, DOMAIN_INDEX, DOMAIN_TOPICS, DOMAIN_LEARN_MIN, DOMAIN_LEARN_SHARE
+from .cache import ClassificationCache
+from .utils import write_json_atomic
+from .domains import DomainIndex, seed_table
+from . import metrics
 
 TOPICS_KEYWORDS={
  'AI':['openai','llama','gpt','huggingface','langchain','transformer'],
@@ -22,34 +26,212 @@ TAGS_KEYWORDS={
  'Video':['youtube','watch','video'],
 }
 
-SEARCH_PATTERNS={
- 'google': re.compile(r"https?://.*google\..*/search\?.*[?&]q=(?P<q>[^&]+)"),
- 'bing': re.compile(r"https?://.*bing\.com/search\?.*q=(?P<q>[^&]+)"),
- 'duckduckgo': re.compile(r"https?://.*duckduckgo\.com/\?.*q=(?P<q>[^&]+)"),
- 'youtube': re.compile(r"https?://(www\.)?(youtube\.com/watch\?v=|youtu\.be/)(?P<q>[^&/]+)"),
+def _query_param(param, *paths):
+    """Handler reading `param` from the query string, optionally only on the given paths."""
+    def handler(parts):
+        if paths and parts.path not in paths: return None
+        vals=urllib.parse.parse_qs(parts.query).get(param)
+        return vals[0] if vals else None
+    return handler
+
+def _youtu_be(parts):
+    return parts.path.strip('/').split('/')[0] or None
+
+# Host key -> (engine, handler). Keys are host suffixes ("bing.com" also matches
+# "www.bing.com"); "label.*" matches that label under any TLD ("google.co.uk").
+SEARCH_ENGINES={
+ 'google.*': ('google', _query_param('q','/search')),
+ 'bing.com': ('bing', _query_param('q','/search')),
+ 'duckduckgo.com': ('duckduckgo', _query_param('q')),
+ 'youtube.com': ('youtube', _query_param('v','/watch')),
+ 'youtu.be': ('youtube', _youtu_be),
 }
 
+def _host_keys(host):
+    labels=host.split('.')
+    for i in range(len(labels)):
+        yield '.'.join(labels[i:])
+        yield labels[i]+'.*'
+
 def extract_search_query(url):
-    for eng,p in SEARCH_PATTERNS.items():
-        m=p.search(url)
-        if m: return eng, m.group('q')
+    """Return (engine, decoded query) for a search/video URL, else (None, None).
+
+    The URL is split once and dispatched on its hostname; the query string is
+    only parsed for known engines.
+    """
+    try: parts=urllib.parse.urlsplit(url or '')
+    except ValueError: return None,None
+    if parts.scheme not in ('http','https') or not parts.hostname: return None,None
+    for key in _host_keys(parts.hostname):
+        hit=SEARCH_ENGINES.get(key)
+        if hit:
+            q=hit[1](parts)
+            return (hit[0], q) if q else (None,None)
     return None,None
 
-def classify_topic(text,url):
-    t=(text or '').lower(); u=(url or '').lower()
-    scores=Counter()
-    for topic,kws in TOPICS_KEYWORDS.items():
-        for kw in kws:
-            if kw in t or kw in u: scores[topic]+=1
-    return max(scores,key=scores.get) if scores else 'Misc'
+def _trie_pattern(words):
+    """Regex alternation for `words` factored into a prefix trie, longest alternative first."""
+    trie={}
+    for w in words:
+        node=trie
+        for ch in w: node=node.setdefault(ch,{})
+        node['']={}
+    def emit(node):
+        alts=[re.escape(ch)+emit(sub) for ch,sub in sorted(node.items()) if ch]
+        if not alts: return ''
+        body=alts[0] if len(alts)==1 and '' not in node else '(?:'+'|'.join(alts)+')'
+        return body+('?' if '' in node else '')
+    return emit(trie)
+
+class KeywordMatcher:
+    """One compiled scan over TOPICS_KEYWORDS and TAGS_KEYWORDS together.
+
+    The pattern is a zero-width lookahead so overlapping keywords are all seen;
+    at each position it reports the longest keyword, and every shorter keyword
+    contained in that one is credited through a precomputed closure. Pass
+    `compiled` (from `compiled()` of a matcher over the same tables) to skip
+    building the pattern and closure.
+    """
+    def __init__(self, topics, tags, compiled=None):
+        self.topic_order={t:i for i,t in enumerate(topics)}
+        self.labels=defaultdict(lambda:([],[]))
+        for topic,kws in topics.items():
+            for kw in kws: self.labels[kw.lower()][0].append(topic)
+        for tag,kws in tags.items():
+            for kw in kws: self.labels[kw.lower()][1].append(tag)
+        if compiled:
+            self.rx=compiled['pattern'] and re.compile(compiled['pattern'])
+            self.closure={w:set(ms) for w,ms in compiled['closure'].items()}
+            return
+        words=[w for w in self.labels if w]
+        self.rx=re.compile('(?=('+_trie_pattern(words)+'))') if words else None
+        self.closure={}
+        for w in sorted(words,key=len):
+            self.closure[w]={w}.union(*(self.closure[m] for m in self._longest(w) if m!=w))
+
+    def compiled(self):
+        """JSON-able pattern and closure, for rebuilding this matcher without recomputing them."""
+        return {'pattern':self.rx.pattern if self.rx else None, 'closure':{w:sorted(ms) for w,ms in self.closure.items()}}
+
+    def _longest(self, s):
+        return {m.group(1) for m in self.rx.finditer(s)} if self.rx else set()
+
+    def scan(self, text, url):
+        """Every keyword occurring in the lowercased title or URL."""
+        found=set()
+        for m in self._longest(f"{text or ''}\0{url or ''}".lower()): found|=self.closure[m]
+        return found
+
+    def tags(self, text, url=''):
+        """Tag set alone, skipping topic scoring."""
+        return {t for kw in self.scan(text,url) for t in self.labels[kw][1]}
+
+    def classify(self, text, url):
+        """Return (topic, tag set) from a single scan; ties go to the earlier topic."""
+        scores=Counter(); tags=set()
+        for kw in self.scan(text,url):
+            tps,tgs=self.labels[kw]
+            for t in tps: scores[t]+=1
+            tags.update(tgs)
+        topic=max(scores,key=lambda t:(scores[t],-self.topic_order[t])) if scores else 'Misc'
+        return topic, tags
+
+MATCHER_FORMAT=1
+
+def rules_fingerprint():
+    """Hash of the keyword tables alone; keys the on-disk compiled matcher."""
+    blob=json.dumps([MATCHER_FORMAT,TOPICS_KEYWORDS,TAGS_KEYWORDS],sort_keys=True)
+    return hashlib.sha1(blob.encode()).hexdigest()
 
-def classify_tags(text,url):
-    tags=set()
+def load_matcher(path=MATCHER_CACHE):
+    """KeywordMatcher for the current tables, reusing the compiled artifact at `path` when its hash matches.
+
+    The artifact is rewritten (atomically) whenever the tables change; any
+    unreadable or stale file is simply rebuilt.
+    """
+    fp=rules_fingerprint()
+    if path:
+        try:
+            art=json.loads(path.read_text())
+            if art.get('fp')==fp: return KeywordMatcher(TOPICS_KEYWORDS,TAGS_KEYWORDS,art)
+        except (OSError, ValueError, KeyError, re.error): pass
+    m=KeywordMatcher(TOPICS_KEYWORDS,TAGS_KEYWORDS)
+    if path:
+        try: write_json_atomic(path, {'fp':fp, **m.compiled()})
+        except OSError: pass
+    return m
+
+_MATCHER=None
+def keyword_matcher():
+    global _MATCHER
+    if _MATCHER is None: _MATCHER=load_matcher()
+    return _MATCHER
+
+_TAG_MATCHER=None
+def tag_matcher():
+    """Matcher over TAGS_KEYWORDS alone, for pages whose topic the domain index already decided."""
+    global _TAG_MATCHER
+    if _TAG_MATCHER is None: _TAG_MATCHER=KeywordMatcher({},TAGS_KEYWORDS)
+    return _TAG_MATCHER
+
+def _search_host(host): return any(k in SEARCH_ENGINES for k in _host_keys(host))
+
+_DOMAINS=None
+def domain_index():
+    """The DomainIndex (seeded from DOMAIN_TOPICS and TOPICS_KEYWORDS, plus what earlier runs learned), or None if disabled."""
+    global _DOMAINS
+    if _DOMAINS is None and DOMAIN_INDEX:
+        _DOMAINS=DomainIndex.load(seed_table(TOPICS_KEYWORDS,DOMAIN_TOPICS,keyword_matcher()), exclude=_search_host)
+    return _DOMAINS
+
+# bump when classify() itself changes, so results cached by an older version are dropped
+CLASSIFY_VERSION=2
+
+def config_fingerprint():
+    """Hash of the keyword tables, domain index settings and tagger identity; cached results are only valid under it."""
+    ident=lambda f: f and f"{getattr(f,'__module__','')}.{getattr(f,'__qualname__',repr(f))}"
+    domains=[DOMAIN_TOPICS,DOMAIN_LEARN_MIN,DOMAIN_LEARN_SHARE] if DOMAIN_INDEX else None
+    blob=json.dumps([CLASSIFY_VERSION,TOPICS_KEYWORDS,TAGS_KEYWORDS,domains,ident(EXTERNAL_TAGGER),ident(LLM_TAGGER)],sort_keys=True,default=list)
+    return hashlib.sha1(blob.encode()).hexdigest()
+
+_CACHE=None
+def classification_cache():
+    global _CACHE
+    if _CACHE is None: _CACHE=ClassificationCache(config_fingerprint())
+    return _CACHE
+
+def flush_state():
+    """Persist the classification cache and what the domain index learned."""
+    classification_cache().flush()
+    if _DOMAINS: _DOMAINS.save()
+
+def classify(text,url,llm_tags=None,persist=True):
+    """Return (topic, sorted tags) for one entry, through the cache.
+
+    On a miss the domain index decides the topic (and domain-level tags) for
+    known domains, and the title and URL are scanned for tags alone; other
+    pages get a full keyword pass, whose result the index learns from.
+    `llm_tags` are results already fetched by the batched tagging stage; when
+    omitted on a cache miss, LLM_TAGGER (if set) is called for this entry
+    alone. With `persist=False` the result is cached for this run only.
+    """
+    cache=classification_cache()
+    hit=cache.get(text,url)
+    if hit: metrics.add('cache_hits'); return hit[0], list(hit[1])
+    metrics.add('cache_misses')
+    domains=domain_index(); known=domains and domains.lookup(url)
+    if known: metrics.add('domain_hits'); topic,tags=known[0],tag_matcher().tags(text,url)|set(known[1])
+    else:
+        topic,tags=keyword_matcher().classify(text,url)
+        if domains: domains.learn(url,topic,tags)
     if EXTERNAL_TAGGER:
         ext=EXTERNAL_TAGGER(text,url,{})
         if ext: tags.update(ext)
-    t=(text or '').lower(); u=(url or '').lower()
-    for tag,kws in TAGS_KEYWORDS.items():
-        for kw in kws:
-            if kw in t or kw in u: tags.add(tag)
-    return sorted(tags)
+    if llm_tags is None and LLM_TAGGER: llm_tags=LLM_TAGGER(text,url,{})
+    if llm_tags: tags.update(llm_tags)
+    tags=sorted(tags); cache.put(text,url,topic,tags,persist)
+    return topic, tags
+
+def classify_topic(text,url): return classify(text,url)[0]
+
+def classify_tags(text,url): return classify(text,url)[1]
@@ -0,0 +1,82 @@
+import re, math, random
+from collections import Counter
+from .config import CLUSTER_BANDS, CLUSTER_ROWS, CLUSTER_MIN_SIZE, CLUSTER_MAX
+from .domains import url_host
+from .classify import _search_host
+try: import numpy as np
+except ImportError: np=None
+
+PRIME=(1<<31)-1  # hash values and coefficients stay below 2**31, so a*x+b fits in int64
+STOPWORDS=frozenset('the and for with you your from how what why when are was this that not but all can new into our out about more'
+                    ' com www http https html index page home official site'.split())
+_WORD=re.compile(r'[^\W\d_]{3,}')
+
+_ENGINES={}
+
+def tokens(title, url):
+    """Distinct title words (3+ letters, no stopwords) plus a `site:<host>` token, except for search engines."""
+    toks={w for w in _WORD.findall((title or '').lower()) if w not in STOPWORDS}
+    host=url_host(url)
+    if host:
+        engine=_ENGINES.get(host)
+        if engine is None: engine=_ENGINES[host]=_search_host(host)
+        if not engine: toks.add('site:'+host)
+    return toks
+
+def _coefficients(k, seed=0):
+    rnd=random.Random(seed)
+    return [rnd.randrange(1,PRIME) for _ in range(k)], [rnd.randrange(0,PRIME) for _ in range(k)]
+
+def _python_signatures(docs, vocab, k):
+    a,b=_coefficients(k)
+    table=[tuple((ai*t+bi)%PRIME for ai,bi in zip(a,b)) for t in range(vocab)]
+    return [tuple(map(min, zip(*(table[t] for t in d)))) for d in docs]
+
+def _numpy_signatures(docs, vocab, k):
+    a,b=(np.array(x, dtype=np.int64) for x in _coefficients(k))
+    table=(np.arange(vocab, dtype=np.int64)[:,None]*a+b)%PRIME
+    flat=np.fromiter((t for d in docs for t in d), dtype=np.int64)
+    starts=np.cumsum([0]+[len(d) for d in docs[:-1]])
+    return [tuple(r) for r in np.minimum.reduceat(table[flat], starts, axis=0).tolist()]
+
+def _find(parent, i):
+    while parent[i]!=i: parent[i]=parent[parent[i]]; i=parent[i]
+    return i
+
+def cluster_titles(items, bands=CLUSTER_BANDS, rows=CLUSTER_ROWS, min_size=CLUSTER_MIN_SIZE, limit=CLUSTER_MAX, terms=3):
+    """Group near-duplicate (title, url) items with MinHash/LSH; returns ([(label, [indices])], [unclustered indices]).
+    Groups merge only when their leaders' word sets are at least (1/bands)**(1/rows) Jaccard-similar."""
+    toksets=[tokens(t,u) for t,u in items]; n=len(items)
+    df=Counter(t for ts in toksets for t in ts)
+    ids={}; docs=[]; owners=[]
+    for i,ts in enumerate(toksets):
+        words=sorted(t for t in ts if not t.startswith('site:')) or sorted(ts)
+        if words: docs.append([ids.setdefault(t,len(ids)) for t in words]); owners.append(i)
+    if not docs: return [], list(range(n))
+    k=bands*rows
+    sigs=(_numpy_signatures if np is not None else _python_signatures)(docs, len(ids), k)
+    sets=[frozenset(d) for d in docs]; threshold=(1/bands)**(1/rows)
+    parent=list(range(len(docs))); size=[1]*len(docs)
+    for band in range(bands):
+        first={}; lo=band*rows
+        for j,s in enumerate(sigs):
+            f=first.setdefault(s[lo:lo+rows], j)
+            if f==j: continue
+            a,b=_find(parent,j),_find(parent,f)
+            if a==b: continue
+            x,y=sets[a],sets[b]  # a group's root is its leader
+            if len(x&y)<threshold*len(x|y): continue
+            if size[a]>size[b]: a,b=b,a
+            parent[a]=b; size[b]+=size[a]
+    groups={}
+    for j in range(len(docs)): groups.setdefault(_find(parent,j),[]).append(owners[j])
+    clusters=[]; rest=sorted(set(range(n))-set(owners))
+    for members in sorted(groups.values(), key=lambda m:(-len(m),m[0])):
+        if len(members)<min_size or len(clusters)>=limit: rest+=members; continue
+        counts=Counter(t for i in members for t in toksets[i])
+        score=lambda t: counts[t]*math.log(n/df[t])
+        words=sorted((t for t in counts if not t.startswith('site:') and counts[t]*4>=len(members)), key=lambda t:(-score(t),t))[:terms]
+        label=' · '.join(words) or max(counts, key=lambda t:(counts[t],t.startswith('site:'),t)).removeprefix('site:')
+        clusters.append((label, sorted(members)))
+    clusters.sort(key=lambda c:(-len(c[1]),c[0]))
+    return clusters, sorted(rest)
@@ -7,7 +7,48 @@ OBSIDIAN_DAILY_TEMPLATE=None
 DAYS_FOR_DAILY=1
 DAYS_FOR_WEEKLY=7
 SYNC_TO_OBSIDIAN=False
+OBSIDIAN_DAILY_NOTE='{date}.md'
+OBSIDIAN_WEEKLY_DIR='Weekly'
 LLM_TAGGER=None
 EXTERNAL_TAGGER=None
 TOP_N_TOPICS=2
 MAX_WEEKLY_ITEMS=1000
+STATE_DIR = BASE_OUTPUT/'.state'
+INCREMENTAL=True
+EXTRACT_TIMEOUT=120
+EXTRACT_BATCH=1000
+EXTRACT_PREFETCH=4
+CLASSIFY_CACHE_SIZE=50_000
+CLASSIFY_CACHE_DB=STATE_DIR/'classify.sqlite'
+CLASSIFY_CACHE_DB_SIZE=500_000
+MATCHER_CACHE=STATE_DIR/'matcher.json'
+LLM_BATCH_SIZE=16
+LLM_CONCURRENCY=4
+LLM_TIMEOUT=30
+LLM_RETRIES=2
+LLM_RATE_LIMIT=5
+WAREHOUSE_DB=BASE_OUTPUT/'history.sqlite'
+METRICS_FILE=None
+PROFILE_DIR=BASE_OUTPUT/'profiles'
+WATCH_INTERVAL=30
+WATCH_DEBOUNCE=5
+CANONICAL_DROP_PARAMS=['utm_*','fbclid','gclid','dclid','gbraid','wbraid','msclkid','yclid','mc_cid','mc_eid','igshid','_ga','_gl']
+CANONICAL_STRIP_FRAGMENT=True
+DOMAIN_INDEX=True
+DOMAIN_TOPICS={}
+DOMAIN_INDEX_DB=STATE_DIR/'domains.json'
+DOMAIN_LEARN_MIN=20
+DOMAIN_LEARN_SHARE=0.95
+SERVE_HOST='127.0.0.1'
+SERVE_PORT=8765
+SERVE_DAYS=30
+SERVE_REFRESH=60
+SEARCH_INDEX=True
+SEARCH_DB=BASE_OUTPUT/'search.sqlite'
+CLUSTER_MISC=False
+CLUSTER_BANDS=12
+CLUSTER_ROWS=3
+CLUSTER_MIN_SIZE=3
+CLUSTER_SHOW=5
+CLUSTER_MAX_ITEMS=5000
+CLUSTER_MAX=30
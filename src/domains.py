@@ -0,0 +1,105 @@
+import json, re
+from collections import Counter
+from pathlib import Path
+from .utils import write_json_atomic
+from .config import DOMAIN_INDEX_DB, DOMAIN_LEARN_MIN, DOMAIN_LEARN_SHARE
+
+_HOSTLIKE=re.compile(r'^[a-z0-9-]+(\.[a-z0-9-]+)*\.([a-z]{2,})$')
+# generic TLDs a topic keyword may end in; any two-letter label counts as a country code
+_GTLDS=frozenset('com org net edu gov mil int info biz io dev app ai tv me xyz tech blog news site online cloud'.split())
+
+def hostlike(kw):
+    """True if `kw` is a domain name ending in a real TLD ("wikipedia.org", not "developer.mozilla")."""
+    m=_HOSTLIKE.match(kw)
+    return bool(m) and (len(m.group(2))==2 or m.group(2) in _GTLDS)
+
+def url_host(url):
+    """Lowercased host of an absolute URL without a leading `www.`; string ops only, no urlsplit."""
+    rest=(url or '').partition('://')[2]
+    host=rest.split('/',1)[0].split('?',1)[0].split('#',1)[0].rpartition('@')[2]
+    if not host or host[0]=='[': return None
+    host=host.split(':',1)[0].lower()
+    return host[4:] if host.startswith('www.') else host
+
+class DomainIndex:
+    """Host -> (topic, tags) answers for pages whose topic is decided by their domain.
+
+    Entries come from three places, most authoritative first: the user's
+    table, host-like keywords in TOPICS_KEYWORDS (tags are whatever that
+    domain alone triggers) and hosts learned from earlier keyword results. A
+    host is learned once at least `min_seen` of its pages were classified and
+    one topic other than Misc took `share` of them; its tags are the ones
+    present on that share of pages. Lookups walk from the host up through its parent domains
+    (a.b.example.com, b.example.com, example.com), one dict probe per label.
+    Hosts for which `exclude(host)` is true (search engines, whose pages are
+    about the query) are never answered or learned. While `log` is a list,
+    every learned page is also appended to it and `save` does nothing, so a
+    worker process can hand its pages to the one process that saves.
+    """
+    def __init__(self, seeds, learned=None, min_seen=DOMAIN_LEARN_MIN, share=DOMAIN_LEARN_SHARE, exclude=lambda host: False):
+        self.min_seen=min_seen; self.share=share; self._exclude=exclude; self.excluded={}
+        self.seeds={h.lower():(t,tuple(tags)) for h,(t,tags) in seeds.items()}
+        self.counts={h:{'n':c['n'],'topics':Counter(c['topics']),'tags':Counter(c['tags'])} for h,c in (learned or {}).items()}
+        self.known=dict(self.seeds); self.dirty=False; self.log=None
+        for h in self.counts: self._promote(h)
+
+    def _promote(self, host):
+        c=self.counts[host]
+        if host in self.seeds or c['n']<self.min_seen: return
+        topic,n=c['topics'].most_common(1)[0]
+        if topic!='Misc' and n>=self.share*c['n']:
+            self.known[host]=(topic, tuple(sorted(t for t,k in c['tags'].items() if k>=self.share*c['n'])))
+
+    def exclude(self, host):
+        hit=self.excluded.get(host)
+        if hit is None: hit=self.excluded[host]=bool(self._exclude(host))
+        return hit
+
+    def lookup(self, url):
+        """(topic, tags) if the page's host or a parent domain is known, else None."""
+        host=url_host(url)
+        if not host or self.exclude(host): return None
+        while '.' in host:
+            hit=self.known.get(host)
+            if hit: return hit
+            host=host[host.index('.')+1:]
+        return None
+
+    def learn(self, url, topic, tags):
+        """Count one keyword-classified page against its host."""
+        host=url_host(url)
+        if not host or self.exclude(host) or host in self.known: return
+        if self.log is not None: self.log.append((url, topic, sorted(tags)))
+        c=self.counts.get(host)
+        if c is None: c=self.counts[host]={'n':0,'topics':Counter(),'tags':Counter()}
+        c['n']+=1; c['topics'][topic]+=1; c['tags'].update(tags); self.dirty=True
+        self._promote(host)
+
+    def replay(self, log):
+        """Learn the pages another process logged, in order."""
+        for url,topic,tags in log: self.learn(url, topic, tags)
+
+    @classmethod
+    def load(cls, seeds, path=DOMAIN_INDEX_DB, **kw):
+        try: learned=json.loads(Path(path).read_text()) if path else None
+        except (OSError, ValueError): learned=None
+        idx=cls(seeds, learned, **kw); idx.path=path
+        return idx
+
+    def save(self):
+        path=getattr(self,'path',None)
+        if not path or not self.dirty or self.log is not None: return
+        write_json_atomic(path, {h:{'n':c['n'],'topics':c['topics'],'tags':c['tags']} for h,c in self.counts.items()})
+        self.dirty=False
+
+def seed_table(topics, user_table, matcher):
+    """{host: (topic, tags)} from the user's DOMAIN_TOPICS plus host-like topic keywords."""
+    seeds={}
+    for topic,kws in topics.items():
+        for kw in kws:
+            kw=kw.lower()
+            if hostlike(kw): seeds.setdefault(kw,(topic,sorted(matcher.classify('',kw)[1])))
+    for host,v in user_table.items():
+        topic,tags=(v,None) if isinstance(v,str) else v
+        seeds[host.lower()]=(topic, sorted(tags) if tags is not None else sorted(matcher.classify('',host.lower())[1]))
+    return seeds
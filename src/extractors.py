@@ -1,7 +1,12 @@
-import sqlite3, datetime, glob
+import sqlite3, glob, sys, time, heapq, queue, threading
+from . import metrics
 from pathlib import Path
-from .utils import safe_copy, chrome_time_to_dt
-from .config import DAYS_FOR_WEEKLY
+from .utils import sqlite_snapshot
+from .records import Visit, browser_name
+from .window import Window
+from .warehouse import Warehouse
+from .config import DAYS_FOR_WEEKLY, INCREMENTAL, EXTRACT_TIMEOUT, EXTRACT_BATCH, EXTRACT_PREFETCH
+from .state import SourceState, source_signature
 
 def safari_history_path(): return Path.home()/ 'Library/Safari/History.db'
 def chrome_history_path(): return Path.home()/ 'Library/Application Support/Google/Chrome/Default/History'
@@ -11,44 +16,176 @@ def firefox_history_path():
     prof=list(base.glob('*.default*'))
     return prof[0]/'places.sqlite' if prof else None
 
-def extract_chrome_like(name, path):
-    if not path or not path.exists(): return []
-    dst=path.parent/f"{name}_copy"
-    if not safe_copy(path,dst): return []
-    conn=sqlite3.connect(dst); cur=conn.cursor()
-    cutoff=datetime.datetime.utcnow()-datetime.timedelta(days=DAYS_FOR_WEEKLY)
-    chrome_epoch=datetime.datetime(1601,1,1)
-    cutoff_ts=int((cutoff-chrome_epoch).total_seconds()*1_000_000)
-    cur.execute("SELECT url,title,last_visit_time FROM urls WHERE last_visit_time>?",(cutoff_ts,))
-    rows=cur.fetchall(); conn.close(); dst.unlink(missing_ok=True)
-    return [{"browser":name,"url":u,"title":t or "","last_visit":chrome_time_to_dt(ts)} for u,t,ts in rows]
-
-def extract_safari():
-    p=safari_history_path()
-    if not p.exists(): return []
-    dst=p.parent/'History_copy'
-    if not safe_copy(p,dst): return []
-    conn=sqlite3.connect(dst); cur=conn.cursor()
-    cutoff=datetime.datetime.now()-datetime.timedelta(days=DAYS_FOR_WEEKLY)
-    cur.execute("SELECT history_items.url, history_visits.title, history_visits.visit_time FROM history_items JOIN history_visits ON history_items.id=history_visits.history_item WHERE visit_time> ?",(cutoff.timestamp(),))
-    rows=cur.fetchall(); conn.close(); dst.unlink(missing_ok=True)
-    return [{"browser":"Safari","url":u,"title":t or "","last_visit":datetime.datetime.fromtimestamp(ts)} for u,t,ts in rows]
-
-def extract_firefox():
-    fp=firefox_history_path()
-    if not fp or not fp.exists(): return []
-    dst=fp.parent/'places_copy.sqlite'
-    if not safe_copy(fp,dst): return []
-    conn=sqlite3.connect(dst); cur=conn.cursor()
-    cutoff=(datetime.datetime.utcnow()-datetime.timedelta(days=DAYS_FOR_WEEKLY)).timestamp()*1_000_000
-    cur.execute("SELECT url,title,last_visit_date FROM moz_places WHERE last_visit_date>?",(cutoff,))
-    rows=cur.fetchall(); conn.close(); dst.unlink(missing_ok=True)
-    return [{"browser":"Firefox","url":u,"title":t or "","last_visit":datetime.datetime.fromtimestamp(ts/1_000_000)} for u,t,ts in rows]
-
-def get_all_entries():
-    ents=[]
-    ents+=extract_chrome_like('Brave', brave_history_path())
-    ents+=extract_chrome_like('Chrome', chrome_history_path())
-    ents+=extract_safari()
-    ents+=extract_firefox()
-    return sorted(ents, key=lambda e:e['last_visit'], reverse=True)
+CHROME_SQL="SELECT url,title,last_visit_time FROM urls WHERE last_visit_time>=? AND last_visit_time<? ORDER BY last_visit_time DESC"
+SAFARI_SQL="SELECT history_items.url, history_visits.title, history_visits.visit_time FROM history_items JOIN history_visits ON history_items.id=history_visits.history_item WHERE visit_time>=? AND visit_time<? ORDER BY visit_time DESC"
+FIREFOX_SQL="SELECT url,title,last_visit_date FROM moz_places WHERE last_visit_date>=? AND last_visit_date<? ORDER BY last_visit_date DESC"
+
+CHROME_EPOCH_US=11_644_473_600_000_000  # 1601-01-01 -> 1970-01-01
+SAFARI_EPOCH_S=978_307_200  # 2001-01-01 (Core Data reference date) -> 1970-01-01
+
+def to_raw(key, us):
+    """Unix microseconds -> `key`'s own timestamp unit."""
+    if key=='Safari': return us/1_000_000-SAFARI_EPOCH_S
+    if key=='Firefox': return us
+    return us+CHROME_EPOCH_US
+
+def raw_bounds(key, window):
+    return to_raw(key, window.start), to_raw(key, window.end)
+
+def default_window(): return Window.trailing(DAYS_FOR_WEEKLY)
+
+def _batches(path, sql, bounds, since, size=EXTRACT_BATCH):
+    """Newest-first row batches of at most `size` rows straight off the cursor."""
+    lo,hi=bounds
+    with sqlite_snapshot(path) as conn:
+        cur=conn.execute(sql,(lo if since is None else max(lo,since), hi))
+        while True:
+            rows=cur.fetchmany(size)
+            if not rows: return
+            yield rows
+
+def _query(path, sql, bounds, since):
+    """Rows in [max(lo, since), hi), or None if the database could not be read."""
+    if not path or not path.exists(): return None
+    try: return [r for b in _batches(path, sql, bounds, since) for r in b]
+    except (OSError, sqlite3.Error): return None
+
+def chrome_like_rows(name, path, since=None, window=None): return _query(path, CHROME_SQL, raw_bounds(name, window or default_window()), since)
+def safari_rows(path, since=None, window=None): return _query(path, SAFARI_SQL, raw_bounds('Safari', window or default_window()), since)
+def firefox_rows(path, since=None, window=None): return _query(path, FIREFOX_SQL, raw_bounds('Firefox', window or default_window()), since)
+
+def chrome_like_entries(name, rows):
+    name=browser_name(name)
+    return [Visit(name,u,t or "",ts-CHROME_EPOCH_US) for u,t,ts in rows]
+
+def safari_entries(rows):
+    name=browser_name('Safari')
+    return [Visit(name,u,t or "",int((ts+SAFARI_EPOCH_S)*1_000_000)) for u,t,ts in rows]
+
+def firefox_entries(rows):
+    name=browser_name('Firefox')
+    return [Visit(name,u,t or "",ts) for u,t,ts in rows]
+
+def extract_chrome_like(name, path, since=None, window=None): return chrome_like_entries(name, chrome_like_rows(name, path, since, window) or [])
+def extract_safari(path=None, since=None, window=None): return safari_entries(safari_rows(path or safari_history_path(), since, window) or [])
+def extract_firefox(path=None, since=None, window=None): return firefox_entries(firefox_rows(path or firefox_history_path(), since, window) or [])
+
+def sources():
+    """(key, path, sql, entries_fn) for every supported browser."""
+    return [
+        ('Brave', brave_history_path(), CHROME_SQL, lambda r: chrome_like_entries('Brave',r)),
+        ('Chrome', chrome_history_path(), CHROME_SQL, lambda r: chrome_like_entries('Chrome',r)),
+        ('Safari', safari_history_path(), SAFARI_SQL, safari_entries),
+        ('Firefox', firefox_history_path(), FIREFOX_SQL, firefox_entries),
+    ]
+
+class _SourceFailed(Exception): pass
+
+def _produce(q, key, batches, timeout, tag=False):
+    """Producer thread: push row batches, then None; an exception is pushed in place of the rest.
+
+    With `tag` every item is pushed as (key, item), so several producers can
+    share one queue. Reported as stage `extract.<key>`; `queue_wait` is the
+    part of its wall time spent blocked on a full queue rather than reading.
+    """
+    put=(lambda item: q.put((key,item), timeout=timeout)) if tag else (lambda item: q.put(item, timeout=timeout))
+    with metrics.stage(f"extract.{key}", rows=0, queue_wait=0.0) as m:
+        try:
+            for b in batches:
+                m['rows']+=len(b); t=time.perf_counter()
+                put(b); m['queue_wait']+=time.perf_counter()-t
+        except queue.Full: batches.close(); m['error']='timeout'; return
+        except Exception as e: m['error']=str(e); put(e); return
+        finally: m['queue_wait']=round(m['queue_wait'], 6)
+    put(None)
+
+def _start(key, batches, timeout, q=None):
+    """Start a producer for `key`; on its own bounded queue, or tagged on the shared queue `q`."""
+    tag=q is not None
+    if not tag: q=queue.Queue(maxsize=EXTRACT_PREFETCH)
+    threading.Thread(target=_produce, args=(q, key, batches, timeout, tag), name=f"extract-{key}", daemon=True).start()
+    return q
+
+def _drain(key, q, timeout):
+    """Yield raw row batches from a producer; raise _SourceFailed (after reporting) if it dies or stalls."""
+    while True:
+        try: item=q.get(timeout=timeout)
+        except queue.Empty:
+            print(f"⚠️ {key}: extraction timed out after {timeout}s", file=sys.stderr); raise _SourceFailed(key)
+        if item is None: return
+        if isinstance(item, Exception):
+            print(f"⚠️ {key}: extraction failed: {item}", file=sys.stderr); raise _SourceFailed(key)
+        yield item
+
+def _consume(key, q, entries_fn, timeout):
+    try:
+        for rows in _drain(key, q, timeout): yield from entries_fn(rows)
+    except _SourceFailed: return
+
+def stream_sources(window=None, timeout=EXTRACT_TIMEOUT):
+    """Stream every browser's visits inside `window` straight from the live databases, newest first.
+
+    Each source is read on its own producer thread, newest first, into a
+    queue holding at most EXTRACT_PREFETCH batches of EXTRACT_BATCH rows; the
+    streams are combined with a heap-based k-way merge, so nothing is ever
+    sorted as a whole. A source that raises, or produces nothing for `timeout`
+    seconds, is reported on stderr and its stream ends there, so one locked or
+    corrupt database cannot stall or abort the run.
+    """
+    window=window or default_window()
+    streams=[]
+    for key,path,sql,entries_fn in sources():
+        if not path or not path.exists(): continue
+        q=_start(key, _batches(path, sql, raw_bounds(key, window), None), timeout)
+        streams.append(_consume(key, q, entries_fn, timeout))
+    return heapq.merge(*streams, key=lambda e:e.ts, reverse=True)
+
+def ingest(warehouse, window=None, timeout=EXTRACT_TIMEOUT, state=None):
+    """Copy visits the warehouse hasn't seen yet from every browser; returns the number added.
+    Skips sources unchanged since they last covered `window`, reads the rest from their watermark."""
+    window=window or default_window()
+    state=state or SourceState(); jobs={}; added=0
+    shared=queue.Queue(maxsize=EXTRACT_PREFETCH*len(sources()))
+    for key,path,sql,entries_fn in sources():
+        if not path or not path.exists(): continue
+        lo,hi=raw_bounds(key, window)
+        if state.unchanged(key, path, lo, hi): continue
+        sig=source_signature(path); mark=state.watermark(key, path, lo)
+        if mark is not None: lo=min(lo, state.marks[key]['lo']); hi=max(hi, state.marks[key].get('hi') or hi)
+        jobs[key]=[path, sig, mark, lo, hi, entries_fn]
+        _start(key, _batches(path, sql, (lo, hi), mark), timeout, shared)
+    while jobs:
+        try: key,item=shared.get(timeout=timeout)
+        except queue.Empty:
+            for key in jobs: print(f"⚠️ {key}: extraction timed out after {timeout}s", file=sys.stderr)
+            break
+        path,sig,top,lo,hi,entries_fn=jobs[key]
+        if item is None: state.update(key, path, sig, top, lo, hi); del jobs[key]
+        elif isinstance(item, Exception):
+            print(f"⚠️ {key}: extraction failed: {item}", file=sys.stderr); del jobs[key]
+        else:
+            added+=warehouse.add(entries_fn(item))
+            jobs[key][2]=item[0][2] if top is None else max(top, item[0][2])
+    warehouse.commit(); state.save()
+    return added
+
+def iter_entries(window=None, incremental=INCREMENTAL, timeout=EXTRACT_TIMEOUT):
+    """Every visit inside `window` as one newest-first timeline.
+
+    `window` defaults to the trailing DAYS_FOR_WEEKLY local days; every source
+    is queried with the same bounds translated into its own epoch. With
+    `incremental` (the default) new visits are first ingested into the local
+    warehouse and the window is then read back from it with an indexed range
+    scan; otherwise the live databases are streamed directly.
+    """
+    window=window or default_window()
+    if not incremental:
+        yield from stream_sources(window, timeout); return
+    wh=Warehouse()
+    try:
+        ingest(wh, window, timeout)
+        yield from wh.iter_range(window.start, window.end)
+    finally: wh.close()
+
+def get_all_entries(window=None, incremental=INCREMENTAL, timeout=EXTRACT_TIMEOUT):
+    return list(iter_entries(window, incremental, timeout))
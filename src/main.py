@@ -1,5 +1,9 @@
 import argparse
-from .service import service_install, service_remove
+import datetime
+import sys
+
+# Everything else is imported inside the command that needs it, so e.g.
+# `summarizer service-install` never loads sqlite3 or the classifier.
 
 
 def cli():
@@ -7,7 +11,37 @@ def cli():
     sub = parser.add_subparsers(dest="command")
 
     # run once
-    sub.add_parser("run", help="Run summarizer immediately")
+    run = sub.add_parser("run", help="Run summarizer immediately")
+    run.add_argument("--metrics-file", default=None, help="Append per-stage timings, row counts, bytes copied and peak RSS as JSON lines")
+    run.add_argument("--profile", nargs="?", const=True, default=None, metavar="DIR", help="Also dump cProfile stats for the hot stages into DIR (default: PROFILE_DIR)")
+
+    # backfill past dates
+    backfill = sub.add_parser("backfill", help="Write daily and weekly notes for a range of past dates")
+    backfill.add_argument("--from", dest="from_date", required=True, type=datetime.date.fromisoformat, help="First day (YYYY-MM-DD)")
+    backfill.add_argument("--to", dest="to_date", default=datetime.date.today(), type=datetime.date.fromisoformat, help="Last day (YYYY-MM-DD, default today)")
+    backfill.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+
+    # keep today's note current
+    watch = sub.add_parser("watch", help="Stay resident and update today's note as browser history changes")
+    watch.add_argument("--interval", type=float, default=None, help="Seconds between polls (default: WATCH_INTERVAL)")
+    watch.add_argument("--debounce", type=float, default=None, help="Seconds the databases must be quiet before updating (default: WATCH_DEBOUNCE)")
+
+    # local query API
+    serve = sub.add_parser("serve", help="Serve classified history as a local JSON API")
+    serve.add_argument("--host", default=None, help="Interface to bind (default: SERVE_HOST)")
+    serve.add_argument("--port", type=int, default=None, help="Port (default: SERVE_PORT)")
+    serve.add_argument("--days", type=int, default=None, help="Trailing days to index (default: SERVE_DAYS)")
+    serve.add_argument("--refresh", type=float, default=None, help="Seconds between background refreshes (default: SERVE_REFRESH)")
+
+    # full-text search
+    search = sub.add_parser("search", help="Search past titles, URLs and search queries")
+    search.add_argument("query", nargs="+", help="Words to look for (all must match, as prefixes)")
+    search.add_argument("--from", dest="from_date", type=datetime.date.fromisoformat, default=None, help="First day (YYYY-MM-DD)")
+    search.add_argument("--to", dest="to_date", type=datetime.date.fromisoformat, default=None, help="Last day (YYYY-MM-DD)")
+    search.add_argument("--topic", default=None, help="Only pages classified under this topic")
+    search.add_argument("--limit", type=int, default=20, help="Maximum results (default 20)")
+    search.add_argument("--raw", action="store_true", help="Pass the query to SQLite FTS5 unchanged")
+    search.add_argument("--json", action="store_true", help="Print results as JSON lines")
 
     # service install/remove
     sub.add_parser("service-install", help="Install macOS LaunchAgent (3AM)")
@@ -16,30 +50,149 @@ def cli():
     args = parser.parse_args()
 
     if args.command == "run":
-        return run_once()
+        return run_once(args.metrics_file, args.profile)
+    elif args.command == "backfill":
+        if args.from_date > args.to_date:
+            parser.error(f"--from {args.from_date} is after --to {args.to_date}")
+        from .backfill import backfill
+        return backfill(args.from_date, args.to_date, args.workers)
+    elif args.command == "watch":
+        from .watch import watch
+        from .config import WATCH_INTERVAL, WATCH_DEBOUNCE
+        interval = WATCH_INTERVAL if args.interval is None else args.interval
+        debounce = WATCH_DEBOUNCE if args.debounce is None else args.debounce
+        return watch(interval, debounce)
+    elif args.command == "serve":
+        from .serve import serve
+        from .config import SERVE_HOST, SERVE_PORT, SERVE_DAYS, SERVE_REFRESH
+        return serve(
+            args.host or SERVE_HOST,
+            SERVE_PORT if args.port is None else args.port,
+            args.days or SERVE_DAYS,
+            SERVE_REFRESH if args.refresh is None else args.refresh,
+        )
+    elif args.command == "search":
+        return search_cli(args)
     elif args.command == "service-install":
+        from .service import service_install
         return service_install()
     elif args.command == "service-remove":
+        from .service import service_remove
         return service_remove()
     else:
         # default: run once
         return run_once()
 
 
-def run_once():
-    import datetime
-    from .extractors import get_all_entries
-    from .markdown_gen import write_daily, write_weekly
-    from .config import DAYS_FOR_WEEKLY
+def search_cli(args):
+    import json
+    import sqlite3
+    from .search import SearchIndex
+
+    index = SearchIndex()
+    try:
+        results = index.search(" ".join(args.query), args.from_date, args.to_date, args.topic, args.limit, args.raw)
+    except sqlite3.Error as e:  # e.g. bad --raw FTS5 syntax
+        print(f"⚠️ search failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        index.close()
+    for r in results:
+        if args.json:
+            print(json.dumps(r))
+            continue
+        title = f"Search: {r['query']}" if r["query"] else (r["title"] or "(Untitled)")
+        print(f"{r['time'].replace('T', ' ')[:16]}  [{r['topic']}] {title}")
+        print(f"    {r['url']}")
+    if not results and not args.json:
+        print("No matches.")
+
 
-    today = datetime.date.today()
-    all_entries = get_all_entries()
+PROFILED_STAGES = ("ingest", "extract", "rollup", "render.daily", "render.weekly")
 
-    daily = [e for e in all_entries if e["last_visit"].date() == today] or all_entries[:1000]
-    write_daily(today, daily)
 
-    start = today - datetime.timedelta(days=DAYS_FOR_WEEKLY - 1)
-    weekly = [e for e in all_entries if start <= e["last_visit"].date() <= today]
-    write_weekly(start, today, weekly)
+def run_once(metrics_file=None, profile=None):
+    """Extract, classify and render today's daily note and the trailing weekly note.
 
+    With `metrics_file` (or METRICS_FILE) each stage's wall time, counters and
+    peak RSS are appended to it as JSON lines and summarised on stderr.
+    `profile` (True for PROFILE_DIR, or a directory) also dumps cProfile stats
+    for the hot stages; metrics then default to `<dir>/metrics.jsonl`.
+    """
+    from pathlib import Path
+    from . import metrics
+    from .config import METRICS_FILE, PROFILE_DIR
+
+    profile_dir = PROFILE_DIR if profile is True else profile
+    metrics_file = metrics_file or METRICS_FILE or (profile_dir and Path(profile_dir) / "metrics.jsonl")
+    m = metrics.activate(metrics.RunMetrics(metrics_file, profile_dir, PROFILED_STAGES)) if metrics_file else None
+    try:
+        with metrics.stage("run"):
+            _run_once()
+    finally:
+        metrics.activate(None)
+    if m:
+        m.write()
+        for rec in m.records:
+            extra = " ".join(f"{k}={v}" for k, v in rec.items() if k not in ("stage", "seconds", "peak_rss"))
+            print(f"⏱ {rec['stage']:<16} {rec['seconds']:9.3f}s  {extra}", file=sys.stderr)
+        print(f"⏱ metrics appended to {metrics_file}", file=sys.stderr)
     print("✅ Summarizer run complete.")
+
+
+def _run_once():
+    from itertools import islice
+    from . import metrics
+    from .extractors import ingest, stream_sources
+    from .markdown_gen import write_daily, write_weekly_summary
+    from .obsidian import sync_vault
+    from .search import index_days
+    from .classify import flush_state
+    from .rollup import rollup, merge_aggregates, day_signature
+    from .warehouse import Warehouse
+    from .config import DAYS_FOR_WEEKLY, INCREMENTAL, SEARCH_INDEX
+    from .window import Window
+
+    window = Window.trailing(DAYS_FOR_WEEKLY)
+    start, today = window.first_day, window.last_day
+    newest_first = list(reversed(window.days))
+
+    if INCREMENTAL:
+        wh = Warehouse()
+        with metrics.stage("ingest") as rec:
+            rec["rows"] = ingest(wh, window)
+        signature = lambda day: wh.signature(*window.day_range(day))
+        visits = lambda day: list(wh.iter_range(*window.day_range(day)))
+        fallback = lambda: list(islice(wh.iter_range(window.start, window.end), 1000))
+    else:
+        # one pass over the live databases buckets every visit by local day
+        with metrics.stage("extract") as rec:
+            days = window.partition(stream_sources(window))
+            rec["rows"] = sum(map(len, days.values()))
+        signature = lambda day: day_signature(days[day])
+        visits = days.__getitem__
+        fallback = lambda: [e for day in newest_first for e in days[day]][:1000]
+
+    # only today, and any earlier day that gained visits, is re-aggregated
+    with metrics.stage("rollup", days=len(newest_first)) as rec:
+        aggs, loaded = rollup(newest_first, signature, visits, always={today})
+        daily = loaded[today]
+        if not daily:
+            daily = fallback()
+        rec["rebuilt"] = len(loaded)
+        rec["rows"] = sum(map(len, loaded.values()))
+
+    with metrics.stage("render.daily", rows=len(daily)):
+        daily_md = write_daily(today, daily)
+    with metrics.stage("render.weekly") as rec:
+        summary = merge_aggregates(aggs)
+        rec["rows"] = summary["visits"]
+        weekly_md = write_weekly_summary(start, today, summary)
+    if SEARCH_INDEX:
+        with metrics.stage("search.index") as rec:
+            rec["days"] = index_days(newest_first, signature, lambda day: loaded.get(day) or visits(day))
+    with metrics.stage("sync") as rec:
+        rec["written"] = sync_vault([(today, daily_md)], [weekly_md])
+    flush_state()
+    if INCREMENTAL:
+        wh.close()
@@ -1,61 +1,116 @@
-import datetime, shutil, urllib.parse
-from pathlib import Path
-from collections import defaultdict, Counter
-from .classify import extract_search_query, classify_topic, classify_tags
-from .config import DAILY_DIR, WEEKLY_DIR, OBSIDIAN_VAULT
+import datetime
+from collections import defaultdict
+from .classify import extract_search_query, classify
+from .config import DAILY_DIR, WEEKLY_DIR, CLUSTER_MISC, CLUSTER_SHOW
+from .rollup import day_aggregate, merge_aggregates, ITEMS_PER_TOPIC
+from .cluster import cluster_titles
+from .canonical import dedupe
+from .tagging import prepare_tags
+from .window import Window
+from .utils import write_atomic
 
-def write_daily(date, entries):
+def _seen(e):
+    """` ×N (browsers)` for a page visited more than once."""
+    return f" ×{e.count} ({', '.join(sorted(e.browsers))})" if e.count>1 else ''
+
+def _clock(fmt):
+    """ts -> local time formatted with `fmt`, built once per distinct minute."""
+    memo={}
+    def fmt_ts(ts):
+        m=ts//60_000_000; s=memo.get(m)
+        if s is None: s=memo[m]=datetime.datetime.fromtimestamp(m*60).strftime(fmt)
+        return s
+    return fmt_ts
+
+def _clustered(out, items, title_url, line, show=None, other=None):
+    """Append Misc `items` as `### label (n)` groups from cluster.cluster_titles, unclustered ones last under `### Other`.
+
+    At most `show` lines per cluster and `other` unclustered lines are written (all when None).
+    """
+    clusters,rest=cluster_titles([title_url(it) for it in items])
+    groups=[(label,idx,show) for label,idx in clusters]
+    if rest: groups.append(('Other',rest,other))
+    for g,(label,idx,limit) in enumerate(groups):
+        if clusters: out.append(('\n' if g else '')+f"### {label} ({len(idx)})\n")
+        out+=[line(items[i]) for i in idx[:limit]]
+        if limit is not None and len(idx)>limit: out.append(f"- _… {len(idx)-limit} more_\n")
+
+def render_daily(date, entries):
+    """The daily note for `entries` (visits, newest first) as one string, one line per canonical URL."""
     iso=date.isoformat()
-    md=DAILY_DIR/f"{iso}.md"
+    pages=dedupe(entries); prepare_tags(pages)
     topics=defaultdict(list); searches=[]
-    for e in entries:
-        eng,q=extract_search_query(e['url'])
+    for e in pages:
+        eng,q=extract_search_query(e.url)
         if eng and q:
-            topic=classify_topic(q,e['url'])
-            tags=classify_tags(q,e['url'])
-            searches.append((eng,q,e['url'],e['last_visit']))
-            topics[topic].append({'title':f"Search: {q}", 'url':e['url'], 'time':e['last_visit'], 'tags':tags})
+            topic,tags=classify(q,e.url)
+            searches.append((eng,q,e))
+            topics[topic].append((f"Search: {q}",e,tags))
         else:
-            topic=classify_topic(e['title'],e['url'])
-            tags=classify_tags(e['title'],e['url'])
-            topics[topic].append({'title':e['title'] or '(Untitled)', 'url':e['url'],'time':e['last_visit'],'tags':tags})
-    all_tags=sorted({t for it in topics.values() for x in it for t in x['tags']})
-    with open(md,'w') as f:
-        f.write('---\n'); f.write(f"date: {iso}\n"); f.write(f"tags: [{', '.join(all_tags)}]\n"); f.write('type: browser-activity\n'); f.write('---\n\n')
-        f.write(f"# Browser Activity — {iso}\n\n")
-        f.write("## 🔍 Searches\n")
-        if searches:
-            for eng,q,url,t in searches:
-                f.write(f"- {t.strftime('%H:%M')} — **{eng}**: {q}\n  - [{url}]({url})\n")
-        else: f.write("_No searches_\n")
-        f.write("\n")
-        for topic,items in sorted(topics.items(), key=lambda kv:-len(kv[1])):
-            f.write(f"## {topic} ({len(items)})\n")
-            for it in items:
-                ts=it['time'].strftime('%H:%M'); tag_str=' '.join(f"`{t}`" for t in it['tags'])
-                f.write(f"- {ts} — [{it['title']}]({it['url']}) {tag_str}\n")
-            f.write("\n")
-    if OBSIDIAN_VAULT:
-        try: shutil.copy(md, OBSIDIAN_VAULT/f"{iso}.md")
-        except: pass
+            topic,tags=classify(e.title,e.url)
+            topics[topic].append((e.title or '(Untitled)',e,tags))
+    all_tags=sorted({t for it in topics.values() for x in it for t in x[2]})
+    hhmm=_clock('%H:%M'); tag_strs={}
+    out=['---\n', f"date: {iso}\n", f"tags: [{', '.join(all_tags)}]\n", 'type: browser-activity\n', '---\n\n',
+         f"# Browser Activity — {iso}\n\n", "## 🔍 Searches\n"]
+    if searches:
+        out+=[f"- {hhmm(e.ts)} — **{eng}**: {q}{_seen(e)}\n  - [{e.url}]({e.url})\n" for eng,q,e in searches]
+    else: out.append("_No searches_\n")
+    out.append("\n")
+    def line(item):
+        title,e,tags=item; key=tuple(tags); tag_str=tag_strs.get(key)
+        if tag_str is None: tag_str=tag_strs[key]=' '.join(f"`{t}`" for t in tags)
+        return f"- {hhmm(e.ts)} — [{title}]({e.url}){_seen(e)} {tag_str}\n"
+    for topic,items in sorted(topics.items(), key=lambda kv:-len(kv[1])):
+        out.append(f"## {topic} ({len(items)})\n")
+        if topic=='Misc' and CLUSTER_MISC: _clustered(out, items, lambda it:(it[0],it[1].url), line)
+        else: out+=[line(it) for it in items]
+        out.append("\n")
+    return ''.join(out)
+
+def write_daily(date, entries):
+    """Write (only if changed) the daily note for `entries`; returns its path. See obsidian.sync_vault for the vault."""
+    md=DAILY_DIR/f"{date.isoformat()}.md"
+    write_atomic(md, render_daily(date, entries))
     return md
 
+WEEKDAYS=('Mon','Tue','Wed','Thu','Fri','Sat','Sun')
+
+def _bar(count, peak, width=30):
+    return '█'*round(width*count/peak) if peak else ''
+
+def _activity(out, summary):
+    out.append(f"## 📊 Activity — {summary['visits']} visits\n")
+    if summary['browsers']: out.append("**Browsers:** "+", ".join(f"{b} ({c})" for b,c in summary['browsers'])+"\n")
+    if summary['tags']: out.append("**Top tags:** "+", ".join(f"{t} ({c})" for t,c in summary['tags'][:10])+"\n")
+    out.append("\n")
+    peak=max(summary['hours'])
+    out.append("```\n"+"".join(f"{h:02d}:00 {c:>6} {_bar(c,peak)}\n" for h,c in enumerate(summary['hours']))+"```\n\n")
+    peak=max(summary['weekdays'])
+    out.append("```\n"+"".join(f"{d}   {c:>6} {_bar(c,peak)}\n" for d,c in zip(WEEKDAYS,summary['weekdays']))+"```\n\n")
+
 def write_weekly(start,end,entries):
+    """Render the weekly note straight from a list of visits (aggregated per day in memory)."""
+    days=Window(start,end).partition(entries)
+    return write_weekly_summary(start, end, merge_aggregates([day_aggregate(d,days[d]) for d in reversed(list(days))]))
+
+def render_weekly_summary(start,end,summary):
+    """The weekly note for merged per-day aggregates (see rollup.merge_aggregates) as one string."""
     iso=f"{start.isoformat()}_to_{end.isoformat()}"
-    md=WEEKLY_DIR/f"weekly-summary-{iso}.md"
-    topics=defaultdict(list)
-    for e in entries:
-        topic=classify_topic(e['title'],e['url'])
-        tags=classify_tags(e['title'],e['url'])
-        topics[topic].append({**e,'tags':tags})
-    with open(md,'w') as f:
-        f.write(f"# Weekly Browser Summary — {iso}\n\n")
-        for topic,items in sorted(topics.items(), key=lambda kv:-len(kv[1])):
-            f.write(f"## {topic} — {len(items)} items\n")
-            doms=Counter(urllib.parse.urlparse(e['url']).netloc for e in items)
-            f.write(f"**Top domains:** "+", ".join(f"{d} ({c})" for d,c in doms.most_common(5))+"\n\n")
-            for e in items[:200]:
-                ts=e['last_visit'].strftime('%Y-%m-%d %H:%M'); tg=', '.join(e['tags'])
-                f.write(f"- {ts} — [{e['title']}]({e['url']}) — `{tg}`\n")
-            f.write("\n")
+    when=_clock('%Y-%m-%d %H:%M')
+    out=[f"# Weekly Browser Summary — {iso}\n\n"]
+    _activity(out, summary)
+    for topic,t in sorted(summary['topics'].items(), key=lambda kv:-kv[1]['count']):
+        out.append(f"## {topic} — {t['count']} items\n")
+        out.append(f"**Top domains:** "+", ".join(f"{d} ({c})" for d,c in t['domains'])+"\n\n")
+        line=lambda it: f"- {when(it[0])} — [{it[1]}]({it[2]}){f' ×{it[4]}' if it[4]>1 else ''} — `{', '.join(it[3])}`\n"
+        if topic=='Misc' and CLUSTER_MISC: _clustered(out, t['items'], lambda it:(it[1],it[2]), line, CLUSTER_SHOW, ITEMS_PER_TOPIC)
+        else: out+=[line(it) for it in t['items']]
+        out.append("\n")
+    return ''.join(out)
+
+def write_weekly_summary(start,end,summary):
+    """Write (only if changed) the weekly note; returns its path."""
+    md=WEEKLY_DIR/f"weekly-summary-{start.isoformat()}_to_{end.isoformat()}.md"
+    write_atomic(md, render_weekly_summary(start, end, summary))
     return md
@@ -0,0 +1,67 @@
+import json, sys, time, threading, contextlib, datetime
+from pathlib import Path
+try: import resource
+except ImportError: resource=None
+
+def peak_rss():
+    """Peak resident set size of this process in bytes (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    if resource is None: return None
+    rss=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform=='darwin' else rss*1024
+
+class RunMetrics:
+    """Per-stage wall time, counters and peak RSS for one run, appended to a JSON lines file.
+
+    Counters added with `add()` go to the stage open on the calling thread,
+    so a producer thread reading one browser reports its own rows and bytes.
+    Stages named in `profile` are also run under cProfile and dumped to
+    `profile_dir/<stage>.prof`; cProfile only sees the thread that opened
+    the stage.
+    """
+    def __init__(self, path=None, profile_dir=None, profile=()):
+        self.path=Path(path) if path else None
+        self.profile_dir=Path(profile_dir) if profile_dir else None
+        self.profile=set(profile)
+        self.run=datetime.datetime.now().astimezone().isoformat(timespec='seconds')
+        self.records=[]; self.lock=threading.Lock(); self.local=threading.local()
+
+    @contextlib.contextmanager
+    def stage(self, name, **fields):
+        rec={'stage':name, **fields}; prev=getattr(self.local,'rec',None); self.local.rec=rec
+        prof=None
+        if self.profile_dir and name in self.profile:
+            import cProfile
+            prof=cProfile.Profile(); prof.enable()
+        t=time.perf_counter()
+        try: yield rec
+        finally:
+            rec['seconds']=round(time.perf_counter()-t, 6)
+            if prof:
+                prof.disable(); self.profile_dir.mkdir(parents=True, exist_ok=True)
+                prof.dump_stats(self.profile_dir/f"{name}.prof")
+            rec['peak_rss']=peak_rss(); self.local.rec=prev
+            with self.lock: self.records.append(rec)
+
+    def add(self, field, n=1):
+        rec=getattr(self.local,'rec',None)
+        if rec is not None: rec[field]=rec.get(field,0)+n
+
+    def write(self):
+        """Append this run's stages (in completion order) to `path`."""
+        if not self.path: return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path,'a') as f:
+            for rec in self.records: f.write(json.dumps({'run':self.run, **rec})+'\n')
+
+_ACTIVE=None
+def activate(m):
+    global _ACTIVE
+    _ACTIVE=m
+    return m
+
+def stage(name, **fields):
+    """A stage on the active RunMetrics, or a no-op context yielding a throwaway dict of `fields`."""
+    return _ACTIVE.stage(name, **fields) if _ACTIVE else contextlib.nullcontext(dict(fields))
+
+def add(field, n=1):
+    if _ACTIVE: _ACTIVE.add(field, n)
@@ -0,0 +1,105 @@
+import json, re, sys, hashlib
+from pathlib import Path
+from .config import OBSIDIAN_VAULT, OBSIDIAN_DAILY_TEMPLATE, OBSIDIAN_DAILY_NOTE, OBSIDIAN_WEEKLY_DIR, SYNC_TO_OBSIDIAN, STATE_DIR
+from .utils import write_atomic, write_json_atomic
+
+SECTION='browser-activity'
+_FRONTMATTER=re.compile(r'\A---\n.*?\n---\n\n?', re.S)
+
+def markers(name):
+    return f"<!-- summarizer:{name} -->", f"<!-- /summarizer:{name} -->"
+
+def split_frontmatter(text):
+    """(frontmatter block or '', rest) of a note."""
+    m=_FRONTMATTER.match(text)
+    return (m.group(0), text[m.end():]) if m else ('', text)
+
+def replace_section(note, name, body):
+    """`note` with the marked section `name` holding `body`; appended at the end if the markers are absent."""
+    start,end=markers(name)
+    block=f"{start}\n{body.rstrip()}\n{end}"
+    i=note.find(start); j=note.find(end, i+len(start)) if i>=0 else -1
+    if i>=0 and j>=0: return note[:i]+block+note[j+len(end):]
+    return (note.rstrip('\n')+'\n\n' if note.strip() else '')+block+'\n'
+
+def _digest(text): return hashlib.sha1(text.encode()).hexdigest()
+
+def _sig(path):
+    try: st=path.stat(); return [st.st_size, st.st_mtime_ns]
+    except FileNotFoundError: return None
+
+class VaultSync:
+    """Merges generated notes into an Obsidian vault, touching only what changed.
+
+    A daily note gets the generated activity inside a marked section of the
+    user's own daily note (created from OBSIDIAN_DAILY_TEMPLATE if missing);
+    anything outside the markers is left alone. Weekly notes are copied into
+    OBSIDIAN_WEEKLY_DIR. `STATE_DIR/obsidian.json` remembers each vault
+    file's section hashes and size/mtime after our last write, so a note
+    whose section is unchanged and that nobody has edited since is skipped
+    without being read. Call `save()` once after a batch.
+    """
+    def __init__(self, vault=OBSIDIAN_VAULT, manifest=None, template=OBSIDIAN_DAILY_TEMPLATE):
+        self.vault=Path(vault); self.template=template
+        self.path=Path(manifest or STATE_DIR/'obsidian.json')
+        try: self.manifest=json.loads(self.path.read_text())
+        except (OSError, ValueError): self.manifest={}
+        self.dirty=False; self.written=0
+
+    def _unchanged(self, rel, dst, hashes):
+        m=self.manifest.get(rel)
+        return bool(m) and m.get('hashes')==hashes and m.get('sig')==_sig(dst)
+
+    def _record(self, rel, dst, hashes):
+        self.manifest[rel]={'hashes':hashes, 'sig':_sig(dst)}; self.dirty=True
+
+    def _new_note(self, date, frontmatter):
+        if self.template:
+            try:
+                t=Path(self.template).read_text()
+                return t.replace('{{date}}', date.isoformat()).replace('{{title}}', date.isoformat())
+            except OSError: pass
+        return frontmatter
+
+    def daily(self, date, md):
+        """Merge the generated daily note at `md` into the vault's note for `date`; True if it was written."""
+        frontmatter,body=split_frontmatter(Path(md).read_text())
+        rel=OBSIDIAN_DAILY_NOTE.format(date=date.isoformat()); dst=self.vault/rel
+        hashes={SECTION:_digest(body)}
+        if self._unchanged(rel, dst, hashes): return False
+        try: note=dst.read_text()
+        except FileNotFoundError: note=self._new_note(date, frontmatter)
+        changed=write_atomic(dst, replace_section(note, SECTION, body))
+        self._record(rel, dst, hashes); self.written+=changed
+        return changed
+
+    def weekly(self, md):
+        """Copy the generated weekly note at `md` into the vault's weekly folder; True if it was written."""
+        md=Path(md); text=md.read_text()
+        rel=f"{OBSIDIAN_WEEKLY_DIR}/{md.name}"; dst=self.vault/rel
+        hashes={'note':_digest(text)}
+        if self._unchanged(rel, dst, hashes): return False
+        changed=write_atomic(dst, text)
+        self._record(rel, dst, hashes); self.written+=changed
+        return changed
+
+    def save(self):
+        if not self.dirty: return
+        write_json_atomic(self.path, self.manifest); self.dirty=False
+
+def sync_vault(daily=(), weekly=()):
+    """Merge (date, path) daily notes and weekly note paths into the vault in one batch, if syncing is on.
+
+    Returns the number of vault files written. Failures are reported and
+    never abort the run.
+    """
+    if not (OBSIDIAN_VAULT and SYNC_TO_OBSIDIAN): return 0
+    try:
+        sync=VaultSync()
+        for date,md in daily: sync.daily(date, md)
+        for md in weekly: sync.weekly(md)
+        sync.save()
+        return sync.written
+    except OSError as e:
+        print(f"⚠️ Obsidian sync failed: {e}", file=sys.stderr)
+        return 0
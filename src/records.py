@@ -0,0 +1,47 @@
+import sys, datetime
+
+class Visit:
+    """One history row.
+
+    `ts` is an integer count of microseconds since the Unix epoch (UTC), so
+    visits from every browser compare directly; `last_visit` turns it into a
+    local datetime only when something actually needs one.
+    """
+    __slots__=('browser','url','title','ts','tags')
+    def __init__(self, browser, url, title, ts, tags=None):
+        self.browser=browser; self.url=url; self.title=title; self.ts=ts; self.tags=tags
+
+    @property
+    def last_visit(self): return datetime.datetime.fromtimestamp(self.ts/1_000_000)
+
+    def __eq__(self, other):
+        return isinstance(other, Visit) and (self.browser,self.url,self.title,self.ts)==(other.browser,other.url,other.title,other.ts)
+
+    def __repr__(self): return f"Visit({self.browser!r}, {self.url!r}, {self.title!r}, {self.ts})"
+
+def browser_name(name): return sys.intern(name)
+
+class Page:
+    """Every visit to one canonical URL collapsed into a single record.
+
+    `ts` is the most recent visit (so pages sort and render like visits),
+    `first` the earliest; `title` is the newest non-empty title seen.
+    """
+    __slots__=('url','title','ts','first','count','browsers','tags')
+    def __init__(self, url, visit):
+        self.url=url; self.title=visit.title; self.ts=self.first=visit.ts
+        self.count=1; self.browsers={visit.browser}; self.tags=None
+
+    def add(self, v):
+        self.count+=1; self.browsers.add(v.browser)
+        if v.title and (v.ts>self.ts or not self.title): self.title=v.title
+        if v.ts>self.ts: self.ts=v.ts
+        if v.ts<self.first: self.first=v.ts
+
+    @property
+    def last_visit(self): return datetime.datetime.fromtimestamp(self.ts/1_000_000)
+
+    @property
+    def first_visit(self): return datetime.datetime.fromtimestamp(self.first/1_000_000)
+
+    def __repr__(self): return f"Page({self.url!r}, {self.title!r}, count={self.count}, browsers={sorted(self.browsers)})"
@@ -0,0 +1,109 @@
+import json, datetime
+from collections import Counter
+from .config import DAILY_DIR, CLUSTER_MISC, CLUSTER_MAX_ITEMS
+from .classify import classify, config_fingerprint, extract_search_query
+from .domains import url_host
+from .analytics import weekly_stats
+from .tagging import prepare_tags
+from .canonical import CanonicalIndex
+from .utils import write_json_atomic
+
+ITEMS_PER_TOPIC=200
+AGG_VERSION=2
+# Misc keeps many more items when it is clustered in the notes (see cluster.py)
+MISC_ITEMS=CLUSTER_MAX_ITEMS if CLUSTER_MISC else ITEMS_PER_TOPIC
+
+def items_cap(topic): return MISC_ITEMS if topic=='Misc' else ITEMS_PER_TOPIC
+
+def aggregate_path(day): return DAILY_DIR/f"{day.isoformat()}.agg.json"
+
+def day_signature(visits):
+    """[count, newest ts] of a day's visits; an aggregate is reused only while this is unchanged."""
+    return [len(visits), max((v.ts for v in visits), default=0)]
+
+def day_aggregate(day, visits, sig=None):
+    """Compact summary of one local day: topic/domain/tag/browser/hour counts and newest items per topic.
+
+    `visits` must be newest first. Visits are collapsed per canonical URL, so
+    each page is classified once (from its newest title) and listed once per
+    topic as [last ts, title, url, tags, visit count]; all counts are still
+    per visit.
+    """
+    index=CanonicalIndex(); owner=[index.add(v) for v in visits]
+    pages=index.newest_first(); prepare_tags(pages); topic_of={}
+    for p in pages: topic_of[p.url],p.tags=classify(p.title,p.url)
+    labels=[]; tags=Counter(); topics={}
+    for v,p in zip(visits,owner):
+        topic=topic_of[p.url]; v.tags=p.tags; labels.append(topic); tags.update(p.tags)
+        topics.setdefault(topic,{'count':0,'domains':{},'items':[]})['count']+=1
+    for p in pages:
+        topic=topic_of[p.url]; items=topics[topic]['items']
+        if len(items)<items_cap(topic): items.append([p.ts,p.title,p.url,p.tags,p.count])
+    stats=weekly_stats(visits, labels, top_n=None)
+    for topic,doms in stats['top_domains'].items(): topics[topic]['domains']=dict(doms)
+    return {'v':AGG_VERSION, 'misc':MISC_ITEMS, 'date':day.isoformat(), 'fp':config_fingerprint(), 'sig':sig or day_signature(visits),
+            'visits':len(visits), 'hours':stats['hours'], 'browsers':dict(stats['browsers']),
+            'tags':dict(tags), 'topics':topics}
+
+def page_records(day, pages):
+    """One JSON-able record per page of `day`, classified the way the daily note does it (searches by their query)."""
+    prepare_tags(pages); out=[]
+    for p in pages:
+        eng,q=extract_search_query(p.url)
+        topic,tags=classify(q,p.url) if eng and q else classify(p.title,p.url)
+        out.append({'ts':p.ts, 'time':datetime.datetime.fromtimestamp(p.ts/1_000_000).isoformat(timespec='seconds'),
+                    'date':day.isoformat(), 'title':p.title, 'url':p.url, 'domain':url_host(p.url), 'topic':topic,
+                    'tags':list(tags), 'browsers':sorted(p.browsers), 'count':p.count,
+                    'search':{'engine':eng,'query':q} if eng and q else None})
+    return out
+
+def load_aggregate(day, sig):
+    """The saved aggregate for `day` if it was built from `sig` under the current keyword config and format."""
+    try: agg=json.loads(aggregate_path(day).read_text())
+    except (OSError, ValueError): return None
+    return agg if agg.get('v')==AGG_VERSION and agg.get('misc',ITEMS_PER_TOPIC)==MISC_ITEMS and agg.get('sig')==list(sig) and agg.get('fp')==config_fingerprint() else None
+
+def save_aggregate(day, agg):
+    write_json_atomic(aggregate_path(day), agg)
+
+def rollup(days, signature, visits, always=()):
+    """Aggregates for `days` (newest first), rebuilding only days whose signature changed.
+
+    `signature(day)` must be cheap; `visits(day)` is only called for days that
+    are rebuilt or listed in `always`. Returns (aggregates, {day: visits} for
+    the days that were loaded).
+    """
+    aggs=[]; loaded={}
+    for day in days:
+        sig=signature(day)
+        agg=None if day in always else load_aggregate(day, sig)
+        if agg is None:
+            vs=loaded[day]=visits(day)
+            agg=day_aggregate(day, vs, sig); save_aggregate(day, agg)
+        aggs.append(agg)
+    return aggs, loaded
+
+def merge_aggregates(aggs, top_n=5):
+    """Combine per-day aggregates (newest day first) into one weekly summary.
+
+    A page listed on several days appears once per topic, at its newest
+    visit, with the visit counts added up. With CLUSTER_MISC, Misc keeps
+    every day's items so the weekly note can cluster them.
+    """
+    hours=[0]*24; weekdays=[0]*7; browsers=Counter(); tags=Counter(); topics={}
+    for a in aggs:
+        hours=[x+y for x,y in zip(hours,a['hours'])]
+        weekdays[datetime.date.fromisoformat(a['date']).weekday()]+=a['visits']
+        browsers.update(a['browsers']); tags.update(a['tags'])
+        for topic,t in a['topics'].items():
+            cap=MISC_ITEMS*len(aggs) if topic=='Misc' and CLUSTER_MISC else ITEMS_PER_TOPIC
+            m=topics.setdefault(topic,{'count':0,'domains':Counter(),'items':{}})
+            m['count']+=t['count']; m['domains'].update(t['domains'])
+            for it in t['items']:
+                if it[2] in m['items']: m['items'][it[2]][4]+=it[4]
+                elif len(m['items'])<cap: m['items'][it[2]]=list(it)
+    for m in topics.values():
+        m['domains']=sorted(m['domains'].items(), key=lambda kv:(-kv[1],kv[0]))[:top_n]; m['items']=list(m['items'].values())
+    by_count=lambda c: sorted(c.items(), key=lambda kv:(-kv[1],kv[0]))
+    return {'visits':sum(a['visits'] for a in aggs), 'hours':hours, 'weekdays':weekdays,
+            'browsers':by_count(browsers), 'tags':by_count(tags), 'topics':topics}
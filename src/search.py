@@ -0,0 +1,93 @@
+import re, json, sqlite3, datetime
+from .config import SEARCH_DB
+
+# bm25 column weights: title, url tokens, search query, topic, tags
+WEIGHTS=(10.0, 2.0, 8.0, 1.0, 1.0)
+
+def url_tokens(url):
+    """Host and path words of a URL as plain text for the tokenizer ("github.com/a-b" -> "github com a b")."""
+    return ' '.join(re.findall(r'[^\W_]+', (url or '').split('://',1)[-1]))
+
+def fts_query(text):
+    """Free text -> FTS5 query: every word must match, as a prefix; FTS syntax characters are neutralised."""
+    words=re.findall(r'[^\W_]+', text or '')
+    return ' '.join(f'"{w}"*' for w in words)
+
+class SearchIndex:
+    """SQLite FTS5 index of every page (per day and canonical URL) under SEARCH_DB.
+
+    `docs` holds the metadata and `docs_fts` the indexed text with the same
+    rowid. A day is re-indexed only when its visit signature or the
+    classification fingerprint differs from what `days` recorded.
+    """
+    def __init__(self, path=SEARCH_DB):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn=sqlite3.connect(path)
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS docs(id INTEGER PRIMARY KEY, day TEXT NOT NULL, ts INTEGER NOT NULL, url TEXT NOT NULL,
+                title TEXT, query TEXT, topic TEXT, tags TEXT, browsers TEXT, count INTEGER);
+            CREATE INDEX IF NOT EXISTS docs_day ON docs(day);
+            CREATE INDEX IF NOT EXISTS docs_topic_day ON docs(topic, day);
+            CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(title, url, query, topic, tags, tokenize='unicode61 remove_diacritics 2');
+            CREATE TABLE IF NOT EXISTS days(day TEXT PRIMARY KEY, sig TEXT, fp TEXT);
+        """)
+
+    def close(self): self.conn.close()
+
+    def stale(self, day, sig, fp):
+        row=self.conn.execute("SELECT sig, fp FROM days WHERE day=?",(day.isoformat(),)).fetchone()
+        return row!=(json.dumps(list(sig)), fp)
+
+    def set_day(self, day, sig, fp, records):
+        """Replace everything indexed for `day` with `records` (see rollup.page_records)."""
+        iso=day.isoformat()
+        with self.conn:
+            self.conn.execute("DELETE FROM docs_fts WHERE rowid IN (SELECT id FROM docs WHERE day=?)",(iso,))
+            self.conn.execute("DELETE FROM docs WHERE day=?",(iso,))
+            for r in records:
+                q=r['search']['query'] if r['search'] else None
+                cur=self.conn.execute("INSERT INTO docs(day,ts,url,title,query,topic,tags,browsers,count) VALUES(?,?,?,?,?,?,?,?,?)",
+                    (iso, r['ts'], r['url'], r['title'], q, r['topic'], json.dumps(r['tags']), json.dumps(r['browsers']), r['count']))
+                self.conn.execute("INSERT INTO docs_fts(rowid,title,url,query,topic,tags) VALUES(?,?,?,?,?,?)",
+                    (cur.lastrowid, r['title'], url_tokens(r['url']), q, r['topic'], ' '.join(r['tags'])))
+            self.conn.execute("INSERT OR REPLACE INTO days VALUES(?,?,?)",(iso, json.dumps(list(sig)), fp))
+
+    def search(self, text, first=None, last=None, topic=None, limit=20, raw=False):
+        """Best matches for `text`, ranked by bm25 (title and search query weigh most), newest first on ties.
+
+        `raw` passes `text` to FTS5 unchanged (phrases, OR, NEAR, column filters).
+        """
+        match=text if raw else fts_query(text)
+        if not match: return []
+        sql=["SELECT d.day, d.ts, d.url, d.title, d.query, d.topic, d.tags, d.browsers, d.count, bm25(docs_fts, ?,?,?,?,?) AS rank",
+             "FROM docs_fts JOIN docs d ON d.id=docs_fts.rowid WHERE docs_fts MATCH ?"]
+        args=[*WEIGHTS, match]
+        if first: sql.append("AND d.day>=?"); args.append(first.isoformat())
+        if last: sql.append("AND d.day<=?"); args.append(last.isoformat())
+        if topic: sql.append("AND d.topic=?"); args.append(topic)
+        sql.append("ORDER BY rank, d.ts DESC LIMIT ?"); args.append(limit)
+        cols=('day','ts','url','title','query','topic','tags','browsers','count','rank')
+        out=[]
+        for row in self.conn.execute(' '.join(sql), args):
+            r=dict(zip(cols,row)); r['tags']=json.loads(r['tags']); r['browsers']=json.loads(r['browsers'])
+            r['time']=datetime.datetime.fromtimestamp(r['ts']/1_000_000).isoformat(timespec='seconds'); out.append(r)
+        return out
+
+def index_days(days, signature, visits, path=SEARCH_DB):
+    """Bring the search index up to date for `days`; same callables as rollup.rollup. Returns days re-indexed.
+
+    `visits(day)` is only called for days whose signature (or the keyword
+    config) changed since they were last indexed.
+    """
+    from .canonical import dedupe
+    from .classify import config_fingerprint
+    from .rollup import page_records
+    idx=SearchIndex(path); fp=config_fingerprint(); n=0
+    try:
+        for day in days:
+            sig=signature(day)
+            if idx.stale(day, sig, fp):
+                idx.set_day(day, sig, fp, page_records(day, dedupe(visits(day)))); n+=1
+    finally: idx.close()
+    return n
@@ -0,0 +1,185 @@
+import sys, json, asyncio, datetime, heapq, urllib.parse
+from collections import defaultdict
+from .config import SERVE_HOST, SERVE_PORT, SERVE_DAYS, SERVE_REFRESH
+from .window import Window
+
+FACETS=('topic','tag','domain','browser')
+MAX_LIMIT=500
+REASONS={200:'OK', 400:'Bad Request', 404:'Not Found', 405:'Method Not Allowed'}
+
+def load_days(window, known):
+    """Ingest new visits, then (sig, records) for every day in `window` whose warehouse signature differs from `known`.
+
+    Runs on a worker thread: it opens its own warehouse connection.
+    """
+    from .extractors import ingest
+    from .warehouse import Warehouse
+    from .canonical import dedupe
+    from .classify import flush_state
+    from .rollup import page_records
+    wh=Warehouse(); changed={}
+    try:
+        ingest(wh, window)
+        for day in window.days:
+            sig=wh.signature(*window.day_range(day))
+            if known.get(day)!=sig:
+                changed[day]=(sig, page_records(day, dedupe(wh.iter_range(*window.day_range(day)))))
+    finally: wh.close()
+    flush_state()
+    return changed
+
+class HistoryIndex:
+    """Classified pages for a window of days, with posting sets by day, topic, tag, domain and browser.
+
+    Days are replaced wholesale when their warehouse signature changes, so a
+    refresh only re-reads and re-classifies days that gained visits.
+    """
+    def __init__(self):
+        self.records={}; self.days={}; self.sigs={}; self.next_id=0
+        self.post={f:defaultdict(set) for f in FACETS}
+
+    def _keys(self, r):
+        yield 'topic',r['topic']; yield 'domain',r['domain']
+        for t in r['tags']: yield 'tag',t
+        for b in r['browsers']: yield 'browser',b
+
+    def drop_day(self, day):
+        for i in self.days.pop(day, ()):
+            r=self.records.pop(i)
+            for f,k in self._keys(r):
+                s=self.post[f][k]; s.discard(i)
+                if not s: del self.post[f][k]
+        self.sigs.pop(day, None)
+
+    def set_day(self, day, sig, records):
+        self.drop_day(day); ids=self.days[day]=[]
+        for r in records:
+            i=r['id']=self.next_id; self.next_id+=1
+            self.records[i]=r; ids.append(i)
+            for f,k in self._keys(r): self.post[f][k].add(i)
+        self.sigs[day]=sig
+
+    def apply(self, window, changed):
+        for day in [d for d in self.days if not window.first_day<=d<=window.last_day]: self.drop_day(day)
+        for day,(sig,records) in changed.items(): self.set_day(day, sig, records)
+
+    def select(self, days=None, any_of=None, text=None):
+        """Ids matching every facet in `any_of` ({facet: [values]}, values OR'ed), `days` and `text`."""
+        sets=[]
+        if days is not None: sets.append({i for d in days for i in self.days.get(d,())})
+        for f,vals in (any_of or {}).items():
+            sets.append(set().union(*(self.post[f].get(v,()) for v in vals)))
+        if sets:
+            sets.sort(key=len); ids=sets[0].intersection(*sets[1:])
+        else: ids=self.records.keys()
+        if text:
+            t=text.lower()
+            ids=[i for i in ids if t in self.records[i]['title'].lower() or t in self.records[i]['url'].lower()]
+        return ids
+
+    def page(self, ids, offset, limit):
+        top=heapq.nlargest(offset+limit, ids, key=lambda i:self.records[i]['ts'])
+        return [self.records[i] for i in top[offset:]]
+
+    def facets(self, ids, n=20):
+        counts={f:defaultdict(int) for f in FACETS}
+        for i in ids:
+            for f,k in self._keys(self.records[i]): counts[f][k]+=1
+        return {f:sorted(c.items(), key=lambda kv:(-kv[1],str(kv[0])))[:n] for f,c in counts.items()}
+
+class BadRequest(ValueError): pass
+
+def _date(s):
+    try: return datetime.date.fromisoformat(s)
+    except ValueError: raise BadRequest(f"bad date: {s!r}")
+
+def _int(s, default, lo, hi):
+    if s is None: return default
+    try: return min(max(int(s), lo), hi)
+    except ValueError: raise BadRequest(f"bad integer: {s!r}")
+
+class HistoryServer:
+    """Local JSON API over a HistoryIndex, refreshed in the background.
+
+    GET /pages     filtered, newest-first pages: day=, from=, to=, topic=,
+                   tag=, domain=, browser= (repeatable; OR within a name,
+                   AND across names), q= (substring of title/URL),
+                   limit=, offset=
+    GET /facets    topic/tag/domain/browser counts for the same filters
+    GET /days      indexed days with their page counts
+    GET /health    index size and time of the last refresh
+    """
+    def __init__(self, days=SERVE_DAYS, refresh=SERVE_REFRESH):
+        self.ndays=days; self.refresh_every=refresh
+        self.index=HistoryIndex(); self.refreshed=None; self.lock=asyncio.Lock()
+
+    async def refresh(self):
+        async with self.lock:
+            window=Window.trailing(self.ndays)
+            changed=await asyncio.get_running_loop().run_in_executor(None, load_days, window, dict(self.index.sigs))
+            self.index.apply(window, changed); self.refreshed=datetime.datetime.now().isoformat(timespec='seconds')
+            return len(changed)
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_every)
+            try:
+                n=await self.refresh()
+                if n: print(f"🔄 {self.refreshed}: re-indexed {n} day(s), {len(self.index.records)} pages", flush=True)
+            except Exception as e: print(f"⚠️ refresh failed: {e}", file=sys.stderr, flush=True)
+
+    def _filters(self, qs):
+        get=lambda k: qs.get(k,[None])[-1]
+        if get('day'): days=[_date(v) for v in qs['day']]
+        elif get('from') or get('to'):
+            first=_date(get('from')) if get('from') else min(self.index.days, default=datetime.date.today())
+            last=_date(get('to')) if get('to') else datetime.date.today()
+            days=[first+datetime.timedelta(days=i) for i in range((last-first).days+1)]
+        else: days=None
+        return self.index.select(days, {f:qs[f] for f in FACETS if f in qs}, get('q'))
+
+    def route(self, method, target):
+        if method!='GET': return 405, {'error':'only GET is supported'}
+        parts=urllib.parse.urlsplit(target); qs=urllib.parse.parse_qs(parts.query)
+        try:
+            if parts.path=='/pages':
+                ids=self._filters(qs)
+                offset=_int(qs.get('offset',[None])[-1], 0, 0, 10**9); limit=_int(qs.get('limit',[None])[-1], 50, 1, MAX_LIMIT)
+                items=self.index.page(ids, offset, limit); total=len(ids)
+                return 200, {'total':total, 'offset':offset, 'limit':limit,
+                             'next_offset':offset+limit if offset+limit<total else None, 'items':items}
+            if parts.path=='/facets':
+                return 200, self.index.facets(self._filters(qs), _int(qs.get('n',[None])[-1], 20, 1, 1000))
+            if parts.path=='/days':
+                return 200, {d.isoformat():len(ids) for d,ids in sorted(self.index.days.items(), reverse=True)}
+            if parts.path=='/health':
+                return 200, {'pages':len(self.index.records), 'days':len(self.index.days), 'refreshed':self.refreshed}
+        except BadRequest as e: return 400, {'error':str(e)}
+        return 404, {'error':f"no such endpoint: {parts.path}"}
+
+    async def handle(self, reader, writer):
+        try:
+            line=await asyncio.wait_for(reader.readline(), 10)
+            while (await asyncio.wait_for(reader.readline(), 10)) not in (b'\r\n', b'\n', b''): pass
+            method,target,_=line.decode('latin-1').split(' ',2)
+            status,body=self.route(method, target)
+        except (ValueError, asyncio.TimeoutError): status,body=400,{'error':'malformed request'}
+        data=json.dumps(body).encode()
+        head=f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n"
+        try:
+            writer.write(head.encode()+data); await writer.drain()
+        except ConnectionError: pass
+        finally: writer.close()
+
+    async def serve(self, host=SERVE_HOST, port=SERVE_PORT):
+        await self.refresh()
+        server=await asyncio.start_server(self.handle, host, port)
+        print(f"🌐 Serving {len(self.index.records)} pages from {len(self.index.days)} days on http://{host}:{port}/pages (refresh every {self.refresh_every}s)", flush=True)
+        refresher=asyncio.create_task(self._refresh_loop())
+        try:
+            async with server: await server.serve_forever()
+        finally: refresher.cancel()
+
+def serve(host=SERVE_HOST, port=SERVE_PORT, days=SERVE_DAYS, refresh=SERVE_REFRESH):
+    try: asyncio.run(HistoryServer(days, refresh).serve(host, port))
+    except KeyboardInterrupt: pass
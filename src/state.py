@@ -0,0 +1,49 @@
+import json
+from pathlib import Path
+from .config import STATE_DIR
+from .utils import write_json_atomic
+
+def source_signature(path):
+    """Return [size, mtime_ns] of a database plus its -wal sidecar, or None if missing."""
+    if not path or not path.exists(): return None
+    sig=[]
+    for p in (path, Path(f"{path}-wal")):
+        try: st=p.stat(); sig+=[st.st_size, st.st_mtime_ns]
+        except FileNotFoundError: sig+=[0,0]
+    return sig
+
+class SourceState:
+    """Per-source high-water marks for incremental ingestion into the warehouse.
+
+    `STATE_DIR/sources.json` maps a source key to its path, file signature,
+    watermark and the range [lo, hi) already ingested (raw timestamps in the
+    browser's own unit).
+    """
+    def __init__(self, root=None):
+        self.root=Path(root or STATE_DIR)
+        self.marks=self._load(self.root/'sources.json', {})
+
+    @staticmethod
+    def _load(p, default):
+        try: return json.loads(p.read_text())
+        except (OSError, ValueError): return default
+
+    def _covers(self, key, path, lo):
+        m=self.marks.get(key)
+        return bool(m) and m.get('path')==str(path) and m.get('lo') is not None and m['lo']<=lo
+
+    def unchanged(self, key, path, lo, hi):
+        """True if everything in raw range [lo, hi) is already ingested and the file hasn't changed."""
+        if not self._covers(key, path, lo): return False
+        m=self.marks[key]
+        return m.get('hi') is not None and m['hi']>=hi and m.get('sig')==source_signature(path)
+
+    def watermark(self, key, path, lo):
+        return self.marks[key]['watermark'] if self._covers(key, path, lo) else None
+
+    def update(self, key, path, sig, watermark, lo, hi):
+        """Record that `key` is ingested over [lo, hi), newest row at `watermark`; take `sig` *before* reading."""
+        self.marks[key]={'path':str(path),'sig':sig,'watermark':watermark,'lo':lo,'hi':hi}
+
+    def save(self):
+        write_json_atomic(self.root/'sources.json', self.marks)
@@ -0,0 +1,73 @@
+import sys, time, threading
+from concurrent.futures import ThreadPoolExecutor
+from .classify import classify, classification_cache, extract_search_query
+from .config import LLM_TAGGER, LLM_BATCH_SIZE, LLM_CONCURRENCY, LLM_TIMEOUT, LLM_RETRIES, LLM_RATE_LIMIT
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across threads; rate<=0 disables it."""
+    def __init__(self, rate):
+        self.interval=1/rate if rate and rate>0 else 0; self.next=0.0; self.lock=threading.Lock()
+    def wait(self):
+        with self.lock:
+            now=time.monotonic(); at=max(now,self.next); self.next=at+self.interval
+        if at>now: time.sleep(at-now)
+
+def _call(tagger, batch, timeout):
+    """Tag one batch: `tagger.batch(items)` if the tagger offers it, else one call per item."""
+    items=[(text,url,{'timeout':timeout}) for text,url in batch]
+    fn=getattr(tagger,'batch',None)
+    res=fn(items) if callable(fn) else [tagger(*it) for it in items]
+    if len(res)!=len(batch): raise ValueError(f"tagger returned {len(res)} results for {len(batch)} items")
+    return [list(r or []) for r in res]
+
+def llm_tag(pairs, tagger=LLM_TAGGER, batch_size=LLM_BATCH_SIZE, concurrency=LLM_CONCURRENCY,
+            timeout=LLM_TIMEOUT, retries=LLM_RETRIES, rate=LLM_RATE_LIMIT):
+    """Tag unique (text, url) pairs in batches; returns {(text, url): [tags] or None}.
+
+    Batches run `concurrency` at a time, each call is rate limited, abandoned
+    after `timeout` seconds and retried with backoff up to `retries` times. A
+    batch that still fails is reported on stderr and its pairs map to None.
+    """
+    pairs=list(dict.fromkeys(pairs))
+    if not tagger or not pairs: return {}
+    batches=[pairs[i:i+batch_size] for i in range(0,len(pairs),batch_size)]
+    limiter=RateLimiter(rate)
+    calls=ThreadPoolExecutor(max_workers=concurrency*(retries+1), thread_name_prefix='llm-call')
+    def run(batch):
+        for attempt in range(retries+1):
+            limiter.wait()
+            try: return calls.submit(_call, tagger, batch, timeout).result(timeout=timeout)
+            except Exception as e:
+                err=e
+                if attempt<retries: time.sleep(min(0.5*2**attempt, 8))
+        print(f"⚠️ LLM tagger: batch of {len(batch)} failed after {retries+1} attempts: {err!r}", file=sys.stderr)
+        return [None for _ in batch]
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='llm') as ex:
+        results=list(ex.map(run, batches))
+    calls.shutdown(wait=False, cancel_futures=True)
+    return {p:tags for batch,res in zip(batches,results) for p,tags in zip(batch,res)}
+
+def classification_inputs(entries):
+    """Every (text, url) the Markdown writers will classify for `entries`."""
+    for e in entries:
+        yield e.title, e.url
+        eng,q=extract_search_query(e.url)
+        if eng and q: yield q, e.url
+
+def prepare_tags(entries, tagger=LLM_TAGGER):
+    """Classify all not-yet-cached inputs up front, fetching LLM tags in batches.
+
+    Afterwards every classify() call made while rendering is a cache hit.
+    Inputs whose LLM batch failed are cached for this run only, so the next
+    run asks the tagger again.
+    """
+    cache=classification_cache()
+    todo=[p for p in dict.fromkeys(classification_inputs(entries)) if cache.get(*p) is None]
+    if not tagger:
+        for text,url in todo: classify(text,url)
+        return len(todo)
+    llm=llm_tag(todo, tagger)
+    for text,url in todo:
+        tags=llm.get((text,url))
+        classify(text,url,llm_tags=tags or [],persist=tags is not None)
+    return len(todo)
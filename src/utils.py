@@ -1,8 +1,61 @@
-import shutil, datetime
-def safe_copy(src,dst):
-    try: shutil.copy(src,dst); return True
-    except: return False
+import os, json, shutil, datetime, sqlite3, tempfile, contextlib, urllib.request
+from pathlib import Path
+from . import metrics
 def chrome_time_to_dt(ts):
     if ts is None: return None
     epoch=datetime.datetime(1601,1,1)
     return epoch+datetime.timedelta(microseconds=ts)
+
+def _open_ro(path):
+    """Open `path` read-only in place inside a read transaction, or return None if it is locked or unreadable."""
+    conn=sqlite3.connect(f"file:{urllib.request.pathname2url(str(path))}?mode=ro", uri=True, timeout=0.5)
+    try: conn.execute("BEGIN"); conn.execute("SELECT count(*) FROM sqlite_master").fetchone(); return conn
+    except sqlite3.Error: conn.close(); return None
+
+@contextlib.contextmanager
+def sqlite_snapshot(path):
+    """Yield a read-only connection to a consistent view of a (possibly live) browser database.
+    Opened in place with `mode=ro`; if the browser holds a lock, a private copy (with `-wal`/`-journal`) is used instead."""
+    path=Path(path)
+    conn=_open_ro(path)
+    if conn is not None:
+        try: yield conn
+        finally: conn.close()
+        return
+    with tempfile.TemporaryDirectory(prefix='summarizer-') as tmp:
+        dst=Path(tmp)/path.name
+        shutil.copyfile(path, dst); metrics.add('bytes_copied', dst.stat().st_size)
+        for suffix in ('-wal','-journal'):
+            side=Path(f"{path}{suffix}")
+            try: shutil.copyfile(side, f"{dst}{suffix}"); metrics.add('bytes_copied', side.stat().st_size)
+            except FileNotFoundError: pass
+        conn=sqlite3.connect(dst)
+        try: yield conn
+        finally: conn.close()
+
+def write_atomic(path, text):
+    """Write `text` to `path` unless it already holds exactly that; returns True if the file changed.
+
+    The new content goes to a uniquely named temporary file in the same
+    directory that is then renamed over `path`, so readers (Obsidian, sync
+    tools) never see a half-written note, concurrent writers (run, watch,
+    backfill workers) never share a temp file, and an unchanged note keeps
+    its mtime.
+    """
+    path=Path(path); data=text.encode()
+    try:
+        if path.stat().st_size==len(data) and path.read_bytes()==data: return False
+    except FileNotFoundError: pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd,tmp=tempfile.mkstemp(prefix=f".{path.name}.", suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd,'wb') as f: f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError): os.unlink(tmp)
+        raise
+    return True
+
+def write_json_atomic(path, obj):
+    """write_atomic for a JSON document; returns True if the file changed."""
+    return write_atomic(path, json.dumps(obj))
@@ -0,0 +1,41 @@
+import sqlite3
+from .config import WAREHOUSE_DB, EXTRACT_BATCH
+from .records import Visit, browser_name
+
+class Warehouse:
+    """Append-only, deduplicated store of every visit ever extracted.
+
+    One row per (browser, url, ts) with `ts` in Unix microseconds, indexed on
+    `ts` so any day or week is a range scan. Summaries read from here, so
+    history the browsers have since pruned can still be rendered.
+    """
+    def __init__(self, path=WAREHOUSE_DB):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn=sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS visits(browser TEXT NOT NULL, url TEXT NOT NULL, ts INTEGER NOT NULL, title TEXT, PRIMARY KEY(browser,url,ts)) WITHOUT ROWID")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS visits_ts ON visits(ts)")
+
+    def add(self, visits):
+        """Insert visits not already stored; returns how many were new."""
+        before=self.conn.total_changes
+        self.conn.executemany("INSERT OR IGNORE INTO visits(browser,url,ts,title) VALUES(?,?,?,?)",
+                              ((v.browser,v.url,v.ts,v.title) for v in visits))
+        return self.conn.total_changes-before
+
+    def commit(self): self.conn.commit()
+    def close(self): self.conn.close()
+
+    def signature(self, start, end):
+        """[count, newest ts] of visits with start <= ts < end; an index-only lookup."""
+        return list(self.conn.execute("SELECT count(*), coalesce(max(ts),0) FROM visits WHERE ts>=? AND ts<?",(start,end)).fetchone())
+
+    def iter_range(self, start, end, size=EXTRACT_BATCH):
+        """Visits with start <= ts < end, newest first, fetched `size` rows at a time."""
+        cur=self.conn.execute("SELECT browser,url,title,ts FROM visits WHERE ts>=? AND ts<? ORDER BY ts DESC",(start,end))
+        names={}
+        while True:
+            rows=cur.fetchmany(size)
+            if not rows: return
+            for b,u,t,ts in rows:
+                yield Visit(names.get(b) or names.setdefault(b,browser_name(b)),u,t or "",ts)
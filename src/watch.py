@@ -0,0 +1,70 @@
+import sys, time, datetime
+from .config import WATCH_INTERVAL, WATCH_DEBOUNCE, DAILY_DIR, SEARCH_INDEX
+from .extractors import sources, ingest
+from .state import SourceState, source_signature
+from .warehouse import Warehouse
+from .window import Window
+
+def snapshot_signatures():
+    """{source key: [size, mtime_ns] of the database and its WAL} for every browser found."""
+    return {key:source_signature(path) for key,path,_,_ in sources() if path and path.exists()}
+
+class Watcher:
+    """Resident process keeping today's daily note current as the browsers write history.
+
+    The warehouse connection, source watermarks, compiled keyword matcher and
+    classification cache stay loaded between updates. Sources are polled with
+    plain stat() calls (database and WAL size/mtime), which works the same on
+    macOS and Linux; after a change the watcher waits until nothing has
+    changed for `debounce` seconds (or `interval + debounce` seconds have
+    passed since the first unprocessed change, so a browser that never stops
+    writing is still picked up), then ingests only the new visits and
+    re-renders today's note. Always goes through the warehouse, whatever
+    INCREMENTAL says, since that is what makes each update incremental.
+    """
+    def __init__(self, interval=WATCH_INTERVAL, debounce=WATCH_DEBOUNCE, clock=time.monotonic, sleep=time.sleep):
+        self.interval=interval; self.debounce=debounce; self.clock=clock; self.sleep=sleep
+        self.wh=Warehouse(); self.state=SourceState(); DAILY_DIR.mkdir(parents=True, exist_ok=True)
+        self.sigs=None; self.changed_at=None; self.pending_since=None; self.day=None
+
+    def poll(self):
+        """One polling step; returns True if today's note was re-rendered."""
+        sigs=snapshot_signatures(); today=datetime.date.today()
+        now=self.clock()
+        if sigs!=self.sigs:
+            self.sigs=sigs; self.changed_at=now
+            if self.pending_since is None: self.pending_since=now
+        due=self.pending_since is not None and (now-self.changed_at>=self.debounce or now-self.pending_since>=self.interval+self.debounce)
+        if not due and today==self.day: return False
+        self.changed_at=self.pending_since=None
+        return self.update(today)
+
+    def update(self, today):
+        """Ingest new visits for `today`; re-render its note if any arrived or the day rolled over."""
+        from .markdown_gen import write_daily
+        from .obsidian import sync_vault
+        from .search import index_days
+        from .classify import flush_state
+        window=Window(today, today)
+        added=ingest(self.wh, window, state=self.state)
+        if not added and today==self.day: return False
+        visits=list(self.wh.iter_range(window.start, window.end))
+        sync_vault([(today, write_daily(today, visits))])
+        if SEARCH_INDEX: index_days([today], lambda d: self.wh.signature(window.start, window.end), lambda d: visits)
+        flush_state()
+        self.day=today
+        print(f"🔄 {datetime.datetime.now():%H:%M:%S} {today}: +{added} visits, {len(visits)} today", flush=True)
+        return True
+
+    def run(self):
+        print(f"👀 Watching browser history every {self.interval}s (debounce {self.debounce}s); Ctrl-C to stop.", flush=True)
+        try:
+            while True:
+                try: self.poll()
+                except Exception as e: print(f"⚠️ watch update failed: {e}", file=sys.stderr, flush=True)
+                self.sleep(self.interval if self.pending_since is None else min(self.interval, self.debounce))
+        except KeyboardInterrupt: pass
+        finally: self.wh.close()
+
+def watch(interval=WATCH_INTERVAL, debounce=WATCH_DEBOUNCE):
+    Watcher(interval, debounce).run()
@@ -0,0 +1,40 @@
+import datetime
+from bisect import bisect_right
+
+def local_midnight_us(day):
+    """Microseconds since the Unix epoch of local midnight starting `day` (DST-aware)."""
+    return int(datetime.datetime.combine(day, datetime.time()).timestamp())*1_000_000
+
+class Window:
+    """A [start, end) range of whole local days, held as Unix-microsecond integers.
+
+    Every extractor receives the same bounds (translated into its browser's raw
+    epoch by the extractor), and `partition` buckets visits by local day
+    without building a datetime per row.
+    """
+    def __init__(self, first_day, last_day):
+        self.first_day=first_day; self.last_day=last_day
+        self.days=[first_day+datetime.timedelta(days=i) for i in range((last_day-first_day).days+1)]
+        self.bounds=[local_midnight_us(d) for d in self.days]+[local_midnight_us(last_day+datetime.timedelta(days=1))]
+        self.start=self.bounds[0]; self.end=self.bounds[-1]
+
+    @classmethod
+    def trailing(cls, days, today=None):
+        """The `days` local days ending with (and including) `today`."""
+        today=today or datetime.date.today()
+        return cls(today-datetime.timedelta(days=days-1), today)
+
+    def __contains__(self, ts): return self.start<=ts<self.end
+
+    def day_range(self, day):
+        """[start, end) of one day of the window in Unix microseconds."""
+        i=(day-self.first_day).days
+        return self.bounds[i], self.bounds[i+1]
+
+    def partition(self, visits):
+        """{date: [visits]} for every day in the window, preserving input order; one pass, no datetimes."""
+        buckets=[[] for _ in self.days]; bounds=self.bounds; n=len(buckets)
+        for v in visits:
+            i=bisect_right(bounds, v.ts)-1
+            if 0<=i<n: buckets[i].append(v)
+        return dict(zip(self.days, buckets))
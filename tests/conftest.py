@@ -0,0 +1,26 @@
+"""Load src/ as the `summarizer` package (the top-level summarizer.py script would shadow it) with HOME in a temp dir."""
+import importlib.util, os, sqlite3, sys, tempfile
+from pathlib import Path
+import pytest
+
+os.environ['HOME']=tempfile.mkdtemp(prefix='summarizer-tests-')
+SRC=Path(__file__).resolve().parent.parent/'src'
+spec=importlib.util.spec_from_file_location('summarizer', SRC/'__init__.py', submodule_search_locations=[str(SRC)])
+sys.modules['summarizer']=importlib.util.module_from_spec(spec); spec.loader.exec_module(sys.modules['summarizer'])
+
+@pytest.fixture
+def chrome_history(tmp_path):
+    """Writer for a minimal Chrome `History` at tmp_path/History: append [(url, title, unix_us)], get its path.
+
+    Each write moves the mtime forward, since a small insert may change neither the size nor the (coarse) mtime.
+    """
+    from summarizer.extractors import CHROME_EPOCH_US
+    path=tmp_path/'History'; stamp=[0]
+    def write(visits=()):
+        conn=sqlite3.connect(path)
+        conn.execute("CREATE TABLE IF NOT EXISTS urls(id INTEGER PRIMARY KEY, url TEXT, title TEXT, last_visit_time INTEGER NOT NULL)")
+        conn.executemany("INSERT INTO urls(url,title,last_visit_time) VALUES(?,?,?)", ((u,t,ts+CHROME_EPOCH_US) for u,t,ts in visits))
+        conn.commit(); conn.close()
+        stamp[0]=max(path.stat().st_mtime_ns, stamp[0]+1_000_000); os.utime(path, ns=(stamp[0], stamp[0]))
+        return path
+    return write
@@ -0,0 +1,34 @@
+import pytest
+from summarizer.canonical import canonical_url, dedupe
+from summarizer.records import Visit
+
+@pytest.mark.parametrize('url,expected', [
+    ('https://example.com/a?utm_source=x&id=7&utm_medium=y', 'https://example.com/a?id=7'),
+    ('https://example.com/a?utm_campaign_2024=z', 'https://example.com/a'),
+    ('https://example.com/a?UTM_Source=x&FBCLID=1&Id=7', 'https://example.com/a?Id=7'),
+    ('https://example.com/a?utm%5Fsource=x&q=a%20b', 'https://example.com/a?q=a%20b'),
+    ('https://example.com/a?b=2&&a=1&gclid=', 'https://example.com/a?b=2&a=1'),
+    ('https://example.com/a?utmost=1', 'https://example.com/a?utmost=1'),
+    ('https://example.com/doc#section-2', 'https://example.com/doc'),
+    ('https://app.example.com/#/inbox/42', 'https://app.example.com/#/inbox/42'),
+    ('https://example.com/#!/feed', 'https://example.com/#!/feed'),
+    ('HTTPS://Example.COM:443/Path', 'https://example.com/Path'),
+    ('http://example.com:80', 'http://example.com/'),
+    ('http://example.com:8080/x', 'http://example.com:8080/x'),
+    ('https://example.com:80/x', 'https://example.com:80/x'),
+    ('https://user:pw@Example.com:443/x', 'https://user:pw@example.com/x'),
+    ('http://[::1]:80/x?utm_id=1', 'http://[::1]/x'),
+    ('http://[2001:DB8::1]:8080/', 'http://[2001:db8::1]:8080/'),
+    ('about:blank', 'about:blank'),
+    ('file:///Users/me/a.html#top', 'file:///Users/me/a.html#top'),
+    ('http://[::1/broken', 'http://[::1/broken'),
+    ('https://example.com:99999/', 'https://example.com:99999/'),
+    ('', ''),
+])
+def test_canonical_url(url, expected):
+    assert canonical_url(url)==expected
+
+def test_dedupe_collapses_tracking_variants():
+    visits=[Visit('Chrome','https://example.com/a?utm_source=x','A',2), Visit('Safari','https://example.com/a#top','A',1)]
+    [page]=dedupe(visits)
+    assert page.url=='https://example.com/a' and page.count==2 and sorted(page.browsers)==['Chrome','Safari']
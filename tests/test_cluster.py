@@ -0,0 +1,45 @@
+import random
+import pytest
+from summarizer import cluster
+
+CITIES=['paris','london','berlin','rome','madrid','vienna','prague','lisbon','dublin','oslo','athens','warsaw']
+FOODS=['bread','cake','cookies','brioche','bagels','pie','muffins','scones','pretzels','croissants']
+
+def titles(n=1500, seed=7):
+    """'Weather in X' and 'How to bake X' pages about the same places: 'weather' is in most titles, so it alone doesn't separate them."""
+    rnd=random.Random(seed); out=[]
+    for i in range(n):
+        place=rnd.choice(CITIES)
+        if rnd.random()<0.6: out.append((f"Weather in {place.title()}", f"https://search.example/{i}"))
+        else: out.append((f"How to bake {place.title()} {rnd.choice(FOODS)}" if rnd.random()<0.5 else f"How to bake {place.title()}", f"https://search.example/{i}"))
+    return out
+
+@pytest.fixture(params=['numpy','python'])
+def backend(request, monkeypatch):
+    if request.param=='python': monkeypatch.setattr(cluster, 'np', None)
+    elif cluster.np is None: pytest.skip("numpy not installed")
+    return request.param
+
+def test_distinct_topics_stay_apart(backend):
+    items=titles()
+    clusters,rest=cluster.cluster_titles(items, min_size=3, limit=1000)
+    assert clusters
+    for label,members in clusters:
+        kinds={'weather' if 'weather' in items[i][0].lower() else 'bake' for i in members}
+        assert len(kinds)==1, (label, len(members))
+    clustered=sum(len(m) for _,m in clusters)
+    assert clustered+len(rest)==len(items) and clustered>len(items)//2
+
+def test_backends_agree(monkeypatch):
+    if cluster.np is None: pytest.skip("numpy not installed")
+    items=titles(400)
+    with_np=cluster.cluster_titles(items)
+    monkeypatch.setattr(cluster, 'np', None)
+    assert cluster.cluster_titles(items)==with_np
+
+def test_labels_use_shared_terms():
+    items=[(f"Sourdough starter feeding day {d}", f"https://bake.example/{d}") for d in range(8)]
+    items+=[(f"Kubernetes ingress timeout {w}", f"https://k8s.example/{w}") for w in ('nginx','traefik','envoy','haproxy','istio','contour')]
+    clusters,rest=cluster.cluster_titles(items, min_size=3)
+    assert [len(m) for _,m in clusters]==[8,6] and not rest
+    assert 'sourdough' in clusters[0][0] and 'kubernetes' in clusters[1][0]
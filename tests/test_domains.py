@@ -0,0 +1,24 @@
+from summarizer.domains import DomainIndex, hostlike
+
+def test_learns_a_real_topic_only():
+    idx=DomainIndex({}, min_seen=3, share=0.6)
+    for i in range(5): idx.learn(f'https://misc.example/{i}', 'Misc', set())
+    for i in range(3): idx.learn(f'https://docs.example/{i}', 'Coding', {'Programming'})
+    assert idx.lookup('https://misc.example/x') is None
+    assert idx.lookup('https://api.docs.example/x')==('Coding', ('Programming',))
+
+def test_misc_is_not_promoted_from_saved_counts():
+    learned={'misc.example':{'n':9,'topics':{'Misc':9},'tags':{}}}
+    assert DomainIndex({}, learned, min_seen=3, share=0.6).lookup('https://misc.example/') is None
+
+def test_hostlike_needs_a_real_tld():
+    assert hostlike('wikipedia.org') and hostlike('bbc.co.uk')
+    assert not hostlike('developer.mozilla') and not hostlike('python')
+
+def test_worker_log_is_replayed_by_the_saving_process(tmp_path):
+    path=tmp_path/'domains.json'
+    worker=DomainIndex.load({}, path, min_seen=3, share=0.6); worker.log=[]
+    for i in range(4): worker.learn(f'https://docs.example/{i}', 'Coding', {'Programming'})
+    worker.save(); assert not path.exists()
+    parent=DomainIndex.load({}, path, min_seen=3, share=0.6); parent.replay(worker.log); parent.save()
+    assert DomainIndex.load({}, path, min_seen=3, share=0.6).lookup('https://docs.example/')==('Coding', ('Programming',))
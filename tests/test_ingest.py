@@ -0,0 +1,61 @@
+import datetime
+import pytest
+from summarizer import extractors as ex
+from summarizer.state import SourceState
+from summarizer.warehouse import Warehouse
+from summarizer.window import Window, local_midnight_us
+
+TODAY=datetime.date.today()
+def day(n): return TODAY-datetime.timedelta(days=n)
+def noon(n): return local_midnight_us(day(n))+12*3600*1_000_000
+
+@pytest.fixture
+def env(tmp_path, monkeypatch, chrome_history):
+    """A Chrome source at tmp_path/History, a fresh warehouse and state, and the list of reads started."""
+    src=chrome_history()
+    monkeypatch.setattr(ex, 'sources', lambda: [('Chrome', src, ex.CHROME_SQL, lambda r: ex.chrome_like_entries('Chrome', r))])
+    reads=[]; real=ex._batches
+    monkeypatch.setattr(ex, '_batches', lambda path, sql, bounds, since, *a: reads.append((bounds, since)) or real(path, sql, bounds, since, *a))
+    wh=Warehouse(tmp_path/'history.sqlite'); state=SourceState(tmp_path/'state')
+    yield src, wh, state, reads
+    wh.close()
+
+def stored(wh): return sorted(url for _,url,_,_ in wh.conn.execute("SELECT * FROM visits"))
+
+def test_unchanged_source_is_not_opened(env, chrome_history):
+    src,wh,state,reads=env
+    chrome_history([('https://a.example/1','a',noon(1))])
+    window=Window.trailing(3)
+    assert ex.ingest(wh, window, state=state)==1 and len(reads)==1
+    assert ex.ingest(wh, window, state=state)==0 and len(reads)==1
+    assert ex.ingest(wh, Window(day(2), day(1)), state=state)==0 and len(reads)==1  # a covered sub-window
+    chrome_history([('https://a.example/2','b',noon(0))])
+    assert ex.ingest(wh, window, state=state)==1 and len(reads)==2
+
+def test_reads_only_from_the_watermark(env, chrome_history):
+    src,wh,state,reads=env
+    chrome_history([('https://a.example/old','old',noon(2)), ('https://a.example/new','new',noon(1))])
+    window=Window.trailing(3)
+    ex.ingest(wh, window, state=state)
+    chrome_history([('https://a.example/late','late',noon(2)+1), ('https://a.example/today','today',noon(0))])
+    assert ex.ingest(wh, window, state=state)==1
+    assert reads[-1][1]==noon(1)+ex.CHROME_EPOCH_US
+    assert stored(wh)==['https://a.example/new','https://a.example/old','https://a.example/today']
+
+def test_run_after_backfill_fills_the_gap(env, chrome_history):
+    src,wh,state,reads=env
+    chrome_history([(f'https://a.example/{n}',str(n),noon(n)) for n in range(12)])
+    assert ex.ingest(wh, Window(day(10), day(8)), state=state)==3
+    assert ex.ingest(wh, Window.trailing(3), state=state)==8
+    assert stored(wh)==sorted(f'https://a.example/{n}' for n in range(11))
+    assert state.unchanged('Chrome', src, *ex.raw_bounds('Chrome', Window(day(9), day(0))))
+
+def test_failed_source_does_not_stop_the_others(env, chrome_history, monkeypatch, capsys):
+    src,wh,state,reads=env
+    bad=src.with_name('places.sqlite'); bad.write_bytes(b'not a database'*100)
+    good=ex.sources()[0]
+    monkeypatch.setattr(ex, 'sources', lambda: [good, ('Firefox', bad, ex.FIREFOX_SQL, ex.firefox_entries)])
+    chrome_history([(f'https://a.example/{i}','t',noon(1)-i) for i in range(20_000)])
+    assert ex.ingest(wh, Window.trailing(3), state=state, timeout=10)==20_000
+    assert 'Firefox: extraction failed' in capsys.readouterr().err
+    assert 'Chrome' in state.marks and 'Firefox' not in state.marks
@@ -0,0 +1,59 @@
+import datetime, pathlib
+import pytest
+from summarizer.obsidian import SECTION, VaultSync, markers, replace_section
+
+DAY=datetime.date(2024, 3, 12)
+START,END=markers(SECTION)
+
+def test_replace_section_rewrites_only_between_markers():
+    note=f"# Day\n\nmine\n{START}\nold\n{END}\n\nmore of mine\n"
+    assert replace_section(note, SECTION, "new\n")==f"# Day\n\nmine\n{START}\nnew\n{END}\n\nmore of mine\n"
+
+def test_replace_section_appends_when_markers_are_missing():
+    assert replace_section("# Day\n\n", SECTION, "new")==f"# Day\n\n{START}\nnew\n{END}\n"
+    assert replace_section("", SECTION, "new")==f"{START}\nnew\n{END}\n"
+    assert replace_section(f"{START}\nonly a start", SECTION, "new").endswith(f"only a start\n\n{START}\nnew\n{END}\n")
+
+@pytest.fixture
+def vault(tmp_path):
+    """(vault dir, generated-note writer, VaultSync factory sharing one manifest)."""
+    root=tmp_path/'vault'; root.mkdir()
+    def generated(body):
+        md=tmp_path/f"{DAY}.md"; md.write_text(f"---\ndate: {DAY}\n---\n\n{body}"); return md
+    return root, generated, lambda template=None: VaultSync(root, tmp_path/'obsidian.json', template)
+
+def test_merges_into_the_users_note(vault):
+    root,generated,sync=vault
+    (root/f"{DAY}.md").write_text("# My day\n\nnotes\n")
+    s=sync(); assert s.daily(DAY, generated("## Activity\n")); s.save()
+    assert (root/f"{DAY}.md").read_text()==f"# My day\n\nnotes\n\n{START}\n## Activity\n{END}\n"
+
+def test_creates_a_missing_note_from_the_template(vault, tmp_path):
+    root,generated,sync=vault
+    template=tmp_path/'Daily.md'; template.write_text(f"# {{{{title}}}}\n\n{START}\n{END}\n\n## Journal\n")
+    assert sync(template).daily(DAY, generated("## Activity\n"))
+    assert (root/f"{DAY}.md").read_text()==f"# {DAY}\n\n{START}\n## Activity\n{END}\n\n## Journal\n"
+
+def test_new_note_without_template_keeps_the_frontmatter(vault):
+    root,generated,sync=vault
+    sync().daily(DAY, generated("## Activity\n"))
+    assert (root/f"{DAY}.md").read_text()==f"---\ndate: {DAY}\n---\n\n{START}\n## Activity\n{END}\n"
+
+def test_unchanged_section_is_skipped_without_reading_the_note(vault, monkeypatch):
+    root,generated,sync=vault
+    s=sync(); s.daily(DAY, generated("## Activity\n")); s.save()
+    reads=[]; real=pathlib.Path.read_text
+    monkeypatch.setattr(pathlib.Path, 'read_text', lambda self, *a, **kw: reads.append(self) or real(self, *a, **kw))
+    s=sync(); assert not s.daily(DAY, generated("## Activity\n"))
+    assert root/f"{DAY}.md" not in reads and not s.dirty
+
+def test_user_edits_are_kept_and_the_section_restored(vault):
+    root,generated,sync=vault
+    note=root/f"{DAY}.md"
+    s=sync(); s.daily(DAY, generated("## Activity\n- a\n")); s.save()
+    note.write_text("# Added by me\n\n"+note.read_text()+"\nfooter\n")
+    s=sync(); assert not s.daily(DAY, generated("## Activity\n- a\n")) and s.dirty; s.save()  # nothing to rewrite, edit recorded
+    assert note.read_text().startswith("# Added by me") and note.read_text().endswith("footer\n")
+    note.write_text(note.read_text().replace("- a\n", ""))
+    s=sync(); assert s.daily(DAY, generated("## Activity\n- a\n"))
+    assert f"{START}\n## Activity\n- a\n{END}" in note.read_text() and note.read_text().startswith("# Added by me")
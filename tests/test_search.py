@@ -0,0 +1,61 @@
+import datetime, sqlite3
+import pytest
+from summarizer.search import SearchIndex, fts_query, url_tokens
+
+D1,D2=datetime.date(2024, 3, 11),datetime.date(2024, 3, 12)
+
+def rec(title, url, topic='Coding', tags=(), query=None, ts=1):
+    return {'ts':ts, 'url':url, 'title':title, 'topic':topic, 'tags':list(tags), 'browsers':['Chrome'], 'count':1,
+            'search':{'engine':'Google','query':query} if query else None}
+
+@pytest.fixture
+def idx(tmp_path):
+    idx=SearchIndex(tmp_path/'search.sqlite')
+    idx.set_day(D1, [2,2], 'fp', [rec('Kubernetes pod crashloop', 'https://k8s.io/docs/pods', tags=['Troubleshooting'], ts=10),
+                                  rec('Recipe: sourdough', 'https://bake.example/bread', topic='Misc', ts=11)])
+    idx.set_day(D2, [1,5], 'fp', [rec('Google Search', 'https://www.google.com/search?q=kubectl+logs', query='kubectl logs', ts=20)])
+    yield idx
+    idx.close()
+
+def titles(hits): return sorted(h['title'] for h in hits)
+
+@pytest.mark.parametrize('text,expected', [
+    ('kube pod', '"kube"* "pod"*'),
+    ('say "hi" OR NEAR(x, y)', '"say"* "hi"* "OR"* "NEAR"* "x"* "y"*'),
+    ('title:foo -bar ^baz*', '"title"* "foo"* "bar"* "baz"*'),
+    ('naïve café_2', '"naïve"* "café"* "2"*'),
+    ('"" () *', ''),
+])
+def test_fts_query_escapes_syntax(text, expected):
+    assert fts_query(text)==expected
+
+def test_url_tokens():
+    assert url_tokens('https://github.com/a-b/c_d?x=1')=='github com a b c d x 1'
+
+def test_search_matches_prefixes_and_queries(idx):
+    assert titles(idx.search('kubern'))==['Kubernetes pod crashloop']
+    assert titles(idx.search('kube'))==['Google Search', 'Kubernetes pod crashloop']  # kubectl, from the URL
+    assert titles(idx.search('kubectl'))==['Google Search']
+    assert titles(idx.search('troubleshoot'))==['Kubernetes pod crashloop']
+    assert idx.search('kube sourdough')==[]
+    assert idx.search('OR NEAR(')==[] and idx.search('')==[]
+
+def test_raw_passes_fts_syntax(idx):
+    assert titles(idx.search('sourdough OR crashloop', raw=True))==['Kubernetes pod crashloop', 'Recipe: sourdough']
+    with pytest.raises(sqlite3.OperationalError): idx.search('NEAR(', raw=True)
+
+def test_date_and_topic_filters(idx):
+    assert titles(idx.search('k', first=D2))==['Google Search']
+    assert titles(idx.search('k', last=D1))==['Kubernetes pod crashloop']
+    assert titles(idx.search('bread OR pods', raw=True, topic='Misc'))==['Recipe: sourdough']
+    assert idx.search('kubern', first=D2, last=D2)==[]
+
+def test_set_day_replaces_the_days_rows(idx):
+    idx.set_day(D1, [1,12], 'fp', [rec('Rust borrow checker', 'https://doc.rust-lang.org/book', ts=12)])
+    assert idx.search('kubern')==[] and idx.search('sourdough')==[]
+    assert titles(idx.search('rust'))==['Rust borrow checker'] and titles(idx.search('kubectl'))==['Google Search']
+    assert idx.conn.execute("SELECT count(*) FROM docs_fts").fetchone()==(2,)
+
+def test_stale(idx):
+    assert not idx.stale(D1, [2,2], 'fp') and not idx.stale(D1, (2,2), 'fp')
+    assert idx.stale(D1, [3,2], 'fp') and idx.stale(D1, [2,2], 'other') and idx.stale(datetime.date(2024, 3, 13), [0,0], 'fp')
@@ -0,0 +1,60 @@
+import threading, time
+import pytest
+from summarizer import classify as cl
+from summarizer.cache import ClassificationCache
+from summarizer.records import Visit
+from summarizer.tagging import llm_tag, prepare_tags
+
+class StubTagger:
+    """Local stand-in for an LLM endpoint: tags each title with its first word, optionally failing or stalling first."""
+    def __init__(self, fail=0, stall=0, delay=0.0):
+        self.fail=fail; self.stall=stall; self.delay=delay; self.calls=[]; self.lock=threading.Lock()
+    def batch(self, items):
+        with self.lock: self.calls.append([text for text,url,opts in items]); n=len(self.calls)
+        if n<=self.stall: time.sleep(self.delay)
+        if n<=self.fail: raise ConnectionError("endpoint down")
+        return [[text.split()[0]] for text,url,opts in items]
+
+PAIRS=[(f"word{i} title", f"https://example.com/{i}") for i in range(10)]
+
+def test_batches_every_pair_once():
+    tagger=StubTagger()
+    out=llm_tag(PAIRS+PAIRS[:3], tagger, batch_size=4, concurrency=2, timeout=5, retries=0, rate=0)
+    assert sorted(len(c) for c in tagger.calls)==[2,4,4]
+    assert out=={p:[p[0].split()[0]] for p in PAIRS}
+
+def test_retries_after_errors():
+    tagger=StubTagger(fail=2)
+    out=llm_tag(PAIRS[:4], tagger, batch_size=4, concurrency=1, timeout=5, retries=2, rate=0)
+    assert len(tagger.calls)==3 and all(v is not None for v in out.values())
+
+def test_stalled_call_times_out_and_is_retried():
+    tagger=StubTagger(stall=1, delay=2)
+    start=time.monotonic()
+    out=llm_tag(PAIRS[:2], tagger, batch_size=2, concurrency=1, timeout=0.2, retries=1, rate=0)
+    assert time.monotonic()-start<1.5
+    assert out[PAIRS[0]]==['word0']
+
+def test_failed_batch_maps_to_none():
+    out=llm_tag(PAIRS[:4], StubTagger(fail=99), batch_size=2, concurrency=2, timeout=5, retries=1, rate=0)
+    assert set(out)==set(PAIRS[:4]) and all(v is None for v in out.values())
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    c=ClassificationCache('test', path=tmp_path/'classify.sqlite')
+    monkeypatch.setattr(cl, '_CACHE', c)
+    monkeypatch.setattr(cl, 'domain_index', lambda: None)
+    monkeypatch.setattr(cl, '_MATCHER', cl.KeywordMatcher(cl.TOPICS_KEYWORDS, cl.TAGS_KEYWORDS))
+    return c
+
+def test_failed_tags_are_retried_next_run(cache):
+    visits=[Visit('Chrome', url, text, 0) for text,url in PAIRS[:3]]
+    down=StubTagger(fail=99)
+    assert prepare_tags(visits, down)==3
+    assert 'word0' not in cl.classify(*PAIRS[0])[1]   # this run renders without LLM tags
+    cache.flush()                                      # end of run: nothing untagged reaches disk
+    up=StubTagger()
+    assert prepare_tags(visits, up)==3
+    assert 'word0' in cl.classify(*PAIRS[0])[1]
+    cache.flush()
+    assert prepare_tags(visits, up)==0
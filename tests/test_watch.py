@@ -0,0 +1,59 @@
+import datetime, types
+import pytest
+from summarizer import extractors as ex, watch
+from summarizer.config import DAILY_DIR
+from summarizer.state import SourceState
+from summarizer.warehouse import Warehouse
+from summarizer.window import local_midnight_us
+
+DAY=datetime.date.today()-datetime.timedelta(days=3); NEXT=DAY+datetime.timedelta(days=1)
+def at(day, hour): return local_midnight_us(day)+hour*3600*1_000_000
+
+class Clock:
+    def __init__(self): self.now=0.0; self.today=DAY
+    def __call__(self): return self.now
+
+@pytest.fixture
+def watcher(tmp_path, monkeypatch, chrome_history):
+    """A Watcher over one synthetic Chrome source, with an injected clock and a settable `today`."""
+    src=chrome_history([('https://a.example/first','First page',at(DAY,9)), ('https://a.example/next','Next day page',at(NEXT,9))])
+    entry=('Chrome', src, ex.CHROME_SQL, lambda r: ex.chrome_like_entries('Chrome', r))
+    monkeypatch.setattr(ex, 'sources', lambda: [entry]); monkeypatch.setattr(watch, 'sources', lambda: [entry])
+    monkeypatch.setattr(watch, 'Warehouse', lambda: Warehouse(tmp_path/'history.sqlite'))
+    monkeypatch.setattr(watch, 'SourceState', lambda: SourceState(tmp_path/'state'))
+    clock=Clock()
+    date=type('date', (datetime.date,), {'today': staticmethod(lambda: clock.today)})
+    monkeypatch.setattr(watch, 'datetime', types.SimpleNamespace(date=date, datetime=datetime.datetime))
+    w=watch.Watcher(interval=30, debounce=5, clock=clock, sleep=lambda s: None)
+    yield w, clock
+    w.wh.close()
+
+def note(day): return (DAILY_DIR/f"{day.isoformat()}.md").read_text()
+
+def test_first_poll_renders_today(watcher):
+    w,clock=watcher
+    assert w.poll() and 'First page' in note(DAY) and 'Next day page' not in note(DAY)
+    clock.now=1; assert not w.poll()
+
+def test_new_rows_rerender_after_debounce(watcher, chrome_history):
+    w,clock=watcher; w.poll()
+    clock.now=2; chrome_history([('https://a.example/2','Second page',at(DAY,10))]); assert not w.poll()
+    clock.now=4; chrome_history([('https://a.example/3','Third page',at(DAY,11))]); assert not w.poll()
+    clock.now=8; assert not w.poll()  # 4s quiet
+    clock.now=9; assert w.poll()
+    assert 'Second page' in note(DAY) and 'Third page' in note(DAY)
+    clock.now=20; assert not w.poll()
+
+def test_constant_writes_are_picked_up_after_interval_plus_debounce(watcher, chrome_history):
+    w,clock=watcher; w.poll()
+    for t in range(10, 45, 2):
+        clock.now=t; chrome_history([(f'https://a.example/busy{t}',f'Busy {t}',at(DAY,12)+t)])
+        assert not w.poll()
+    clock.now=45; chrome_history([('https://a.example/last','Last busy',at(DAY,13))])
+    assert w.poll() and 'Last busy' in note(DAY)
+
+def test_day_rollover_renders_the_new_day(watcher):
+    w,clock=watcher; w.poll()
+    clock.now=60; clock.today=NEXT
+    assert w.poll() and 'Next day page' in note(NEXT)
+    clock.now=61; assert not w.poll()